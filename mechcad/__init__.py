@@ -0,0 +1 @@
+"""Generation back end for the MechCAD Stop Streamlit app."""
@@ -0,0 +1,232 @@
+"""Build-time estimates and admission control for generation requests.
+
+:class:`CostModel` predicts how long a part takes to build and export from
+a per-component "work" figure (tooth count, thread turns, ...). Out of the
+box it uses rough defaults; given ``python -m mechcad bench`` results
+(cold builds only, see :mod:`mechcad.bench`) it fits
+``seconds = base + per_unit * work`` per component by least squares.
+
+:class:`Admission` applies the policy the engine enforces: requests whose
+estimate exceeds ``max_seconds`` are refused up front, each user runs at
+most ``max_per_user`` builds at a time (up to ``max_queued_per_user``
+later requests wait in a per-user queue, further ones are refused), and
+every build is killed after ``timeout`` seconds of wall-clock time.
+Requests without a user (CLI, warm-up) are not capped.
+"""
+import functools
+import math
+import os
+import threading
+from collections import Counter, defaultdict, deque
+
+from mechcad.cache import default_cache
+from mechcad.catalog import size_dimensions
+from mechcad.registry import ValidationError
+
+DEFAULT_MAX_PER_USER = 2
+DEFAULT_MAX_QUEUED_PER_USER = 8
+DEFAULT_TIMEOUT = 300.0  # seconds of wall-clock time per build
+DEFAULT_MAX_SECONDS = 900.0  # largest estimate that is accepted
+
+# (base seconds, seconds per unit of work) until calibrated from a bench run
+DEFAULT_COST = (1.0, 0.05)
+
+
+class QueueFull(ValidationError):
+    """The user already has as many builds running and waiting as the policy allows."""
+
+
+class TooExpensive(ValidationError):
+    """The build's estimate exceeds the policy's limit."""
+
+    def __init__(self, message, seconds):
+        super().__init__(message)
+        self.seconds = seconds
+
+
+def work(component, category, params):
+    """Relative amount of geometry a part needs, roughly its tooth or thread-turn count."""
+    module = params.get("module", 1.0)
+    if component in ("SpurGear", "BevelGear", "RingGear"):
+        return params["teeth_number"]
+    if component == "CrossedHelicalGear":
+        twist = abs(math.tan(math.radians(params["helix_angle"]))) * params["width"] / (math.pi * module)
+        return params["teeth_number"] * (1 + twist)
+    if component == "RackGear":
+        return params["length"] / (math.pi * module)
+    if component == "Worm":
+        return params["n_threads"] * params["length"] / (math.pi * module)
+    if category in ("Nut", "Screw") and not params.get("simple", True):
+        dims = size_dimensions(category, params["size"])
+        pitch = dims.get("pitch") or 1.0
+        length = params.get("length", dims.get("diameter", 5.0))
+        return length / pitch
+    return 1.0
+
+
+class CostModel:
+    def __init__(self, coefficients=None):
+        self.coefficients = dict(coefficients or {})  # component -> (base, per_unit)
+
+    @classmethod
+    def from_bench(cls, results):
+        """Fit the model to a ``mechcad bench`` results document.
+
+        Only runs whose builds started from an empty shape cache are accepted:
+        timings of cached thread segments or gear bodies would teach the model
+        cache-hit times and let expensive cold builds through.
+        """
+        from mechcad import pipeline  # noqa: F401  (registers the built-in parts)
+        from mechcad.registry import REGISTRY
+        if not results.get("meta", {}).get("cold_builds"):
+            raise ValueError("bench results were not recorded with cold builds; run the benchmark again")
+        samples = defaultdict(list)
+        for row in results["cases"]:
+            comp = REGISTRY.get(row["component"])
+            if comp is None or row.get("error") or row.get("build_s") is None:
+                continue
+            try:
+                units = work(comp.name, comp.category, comp.coerce(row["params"]))
+            except (KeyError, ValidationError):
+                continue
+            samples[comp.name].append((units, row["build_s"] + (row.get("export_s") or 0.0)))
+        coefficients = {}
+        for name, points in samples.items():
+            n = len(points)
+            mean_x = sum(x for x, _ in points) / n
+            mean_y = sum(y for _, y in points) / n
+            spread = sum((x - mean_x) ** 2 for x, _ in points)
+            slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / spread if spread else 0.0
+            if slope <= 0:
+                coefficients[name] = (mean_y, 0.0)
+            else:
+                coefficients[name] = (max(mean_y - slope * mean_x, 0.0), slope)
+        return cls(coefficients)
+
+    def estimate(self, comp, params):
+        """Predicted build and export seconds of a component with typed parameters."""
+        base, per_unit = self.coefficients.get(comp.name, DEFAULT_COST)
+        return base + per_unit * work(comp.name, comp.category, params)
+
+
+def bench_path():
+    return os.environ.get("MECHCAD_BENCH_FILE") or os.path.join(default_cache().directory, "bench.json")
+
+
+@functools.lru_cache(maxsize=None)
+def default_model():
+    """The cost model calibrated from the bench results at :func:`bench_path`, if there are any."""
+    from mechcad import bench
+    try:
+        return CostModel.from_bench(bench.load(bench_path()))
+    except (OSError, ValueError, KeyError):
+        return CostModel()
+
+
+def _duration(seconds):
+    return f"{seconds:.0f} s" if seconds < 120 else f"{seconds / 60:.0f} min"
+
+
+def _env(name, default):
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+class Admission:
+    def __init__(self, model=None, max_per_user=DEFAULT_MAX_PER_USER, timeout=DEFAULT_TIMEOUT,
+                 max_seconds=DEFAULT_MAX_SECONDS, max_queued_per_user=DEFAULT_MAX_QUEUED_PER_USER):
+        self._model = model
+        self.max_per_user = max_per_user
+        self.max_queued_per_user = max_queued_per_user
+        self.timeout = timeout
+        self.max_seconds = max_seconds
+        self._running = Counter()
+        self._waiting = defaultdict(deque)  # user -> (future, start) of builds waiting for a slot
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(max_per_user=int(_env("MECHCAD_MAX_JOBS_PER_USER", DEFAULT_MAX_PER_USER)),
+                   timeout=_env("MECHCAD_BUILD_TIMEOUT", DEFAULT_TIMEOUT),
+                   max_seconds=_env("MECHCAD_MAX_ESTIMATE", DEFAULT_MAX_SECONDS),
+                   max_queued_per_user=int(_env("MECHCAD_MAX_QUEUED_PER_USER", DEFAULT_MAX_QUEUED_PER_USER)))
+
+    @property
+    def model(self):
+        return default_model() if self._model is None else self._model
+
+    def check(self, comp, params, user=None):
+        """Return the estimated seconds; raise ValidationError if it is too long or ``user``'s queue is full."""
+        return self.admit(self.model.estimate(comp, params), f"This {comp.label}",
+                          "Try fewer teeth, a shorter length or a larger module.", user)
+
+    def admit(self, seconds, subject, hint, user=None):
+        """:meth:`check` for a build whose estimate is already known, e.g. an assembly."""
+        if self.max_seconds and seconds > self.max_seconds:
+            raise TooExpensive(f"{subject} would take about {_duration(seconds)} to build; "
+                               f"the limit is {_duration(self.max_seconds)}. {hint}", seconds)
+        self.check_queue(user)
+        return seconds
+
+    def check_queue(self, user):
+        """Raise QueueFull if ``user`` can neither start nor queue another build."""
+        if user is None:
+            return
+        with self._lock:
+            full = self._running[user] >= self.max_per_user and self._queued(user) >= self.max_queued_per_user
+        if full:
+            raise QueueFull(f"You have reached the limit of {self.max_per_user} running and "
+                            f"{self.max_queued_per_user} waiting builds; try again when some have finished.")
+
+    def _queued(self, user):
+        # builds cancelled while waiting stay in the deque until their turn comes up
+        return sum(1 for future, _ in self._waiting.get(user, ()) if not future.done())
+
+    def request(self, user, future, start):
+        """Call ``start()`` now, or once ``user`` has a free slot; ``future`` is the build's result."""
+        if user is None:
+            start()
+            return
+        with self._lock:
+            if self._running[user] >= self.max_per_user:
+                self._waiting[user].append((future, start))
+                return
+            self._running[user] += 1
+        self._start(user, future, start)
+
+    def position(self, user, future):
+        """1-based place of ``future`` in ``user``'s queue, or None if it is not waiting."""
+        with self._lock:
+            place = 0
+            for waiting, _ in self._waiting.get(user, ()):
+                if waiting.done():
+                    continue
+                place += 1
+                if waiting is future:
+                    return place
+        return None
+
+    def _start(self, user, future, start):
+        # a future that is already done (cancelled while waiting) releases its slot at once
+        future.add_done_callback(lambda _f: self._release(user))
+        start()
+
+    def _release(self, user):
+        with self._lock:
+            waiting = self._waiting[user]
+            entry = waiting.popleft() if waiting else None
+            if entry is None:
+                self._running[user] -= 1
+                if not self._running[user]:
+                    del self._running[user]
+                del self._waiting[user]
+        if entry is not None:
+            self._start(user, *entry)
+
+    def stats(self):
+        with self._lock:
+            return {"running": sum(self._running.values()),
+                    "waiting": sum(self._queued(user) for user in self._waiting),
+                    "users": len(self._running), "max_per_user": self.max_per_user,
+                    "max_queued_per_user": self.max_queued_per_user,
+                    "timeout": self.timeout}
@@ -0,0 +1,80 @@
+"""Single multi-body STEP export for BOM batches.
+
+Every unique part becomes one sub-assembly that is placed once per instance,
+so identical parts share one geometry definition in the exported file.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from mechcad import pipeline
+from mechcad.cache import cache_key, default_cache
+
+GAP = 5.0  # mm between automatically placed parts
+
+
+@dataclass
+class AssemblyPart:
+    component: str
+    params: Dict[str, Any]
+    name: str
+    # one entry per instance: (x, y, z, rz) or (x, y, z, rz, rx, ry) with angles in degrees,
+    # or None to place it automatically
+    positions: List[Optional[Tuple[float, ...]]] = field(default_factory=lambda: [None])
+
+
+def build_assembly(parts, shapes, name="assembly"):
+    """Return the cq.Assembly for ``parts`` and a map of shape id -> part name.
+
+    Parts without explicit positions are laid out in columns along X, one
+    column per unique part, instances stacked along Y.
+    """
+    import cadquery as cq
+    assy = cq.Assembly(name=name)
+    part_names = {}
+    used = set()
+    column_x = 0.0
+    for part, shape in zip(parts, shapes):
+        stem = part.name.rsplit(".", 1)[0]
+        while stem in used:
+            stem += "_"
+        used.add(stem)
+        sub = cq.Assembly(shape, name=stem)
+        part_names[id(shape)] = stem
+        bb = shape.BoundingBox()
+        stacked = 0
+        for index, position in enumerate(part.positions, 1):
+            if position is None:
+                x, y, z, rz = column_x - bb.xmin, stacked * (bb.ylen + GAP) - bb.ymin, 0.0, 0.0
+                stacked += 1
+            else:
+                x, y, z, rz = position[:4]
+            loc = cq.Location(cq.Vector(x, y, z), cq.Vector(0, 0, 1), rz)
+            if position is not None and len(position) > 4:
+                # tilt about X, then Y, after turning about the part's own Z axis
+                rx, ry = position[4:6]
+                loc = (cq.Location(cq.Vector(x, y, z)) * cq.Location(cq.Vector(), cq.Vector(0, 1, 0), ry)
+                       * cq.Location(cq.Vector(), cq.Vector(1, 0, 0), rx) * cq.Location(cq.Vector(), cq.Vector(0, 0, 1), rz))
+            assy.add(sub, name=f"{stem}_{index}", loc=loc)
+        if stacked:
+            column_x += bb.xlen + GAP
+    return assy, part_names
+
+
+def generate_assembly(parts, name="assembly", cache=None):
+    cache = default_cache() if cache is None else cache
+    key = cache_key("Assembly", {"name": name, "parts": [[p.component, p.params, p.name, p.positions]
+                                                          for p in parts]})
+    file_name = f"{name}.step"
+    data = cache.get(key)
+    if data is not None:
+        return pipeline.GeneratedFile(data, file_name, key, cached=True)
+
+    from mechcad.export import assembly_to_step_bytes
+    shapes = []
+    for part in parts:
+        comp, params = pipeline.prepare(part.component, part.params)
+        shapes.append(pipeline.load_shape(comp, params, cache_key(comp.name, params), cache))
+    assy, part_names = build_assembly(parts, shapes, name)
+    data = assembly_to_step_bytes(assy, part_names)
+    cache.put(key, data)
+    return pipeline.GeneratedFile(data, file_name, key)
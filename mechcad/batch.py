@@ -0,0 +1,263 @@
+"""Bill-of-materials batches: many parts per request, built in parallel.
+
+A BOM is a CSV or JSON list of rows. Each row names a component (class name
+or UI label), an optional quantity and file name, and the component's
+parameters. Identical parts are built once; results arrive in completion
+order and can be streamed into a ZIP archive with a per-part report.
+"""
+import csv
+import io
+import json
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import TimeoutError
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from mechcad import pipeline
+from mechcad.admission import QueueFull
+from mechcad.assembly import AssemblyPart
+from mechcad.cache import cache_key
+from mechcad.engine import DONE, FAILED
+from mechcad.registry import ValidationError
+
+RESERVED = ("component", "quantity", "name", "x", "y", "z", "rz")
+TIMED_OUT = "Timed out"
+
+
+@dataclass
+class BomRow:
+    component: str
+    params: Dict[str, Any]
+    quantity: int = 1
+    name: Optional[str] = None
+    position: Optional[Tuple[float, ...]] = None
+
+
+@dataclass
+class PartResult:
+    rows: List[int]
+    component: str
+    quantity: int
+    name: str = ""
+    key: Optional[str] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+    positions: List[Optional[Tuple[float, ...]]] = field(default_factory=list)
+    state: str = DONE
+    elapsed: float = 0.0
+    cached: bool = False
+    error: Optional[str] = None
+    data: Optional[bytes] = field(default=None, repr=False)
+    refusal: Optional[ValidationError] = field(default=None, repr=False)  # why the engine refused the part
+
+    @property
+    def ok(self):
+        return self.state == DONE
+
+
+def _blank(value):
+    # empty CSV cells and NaN from empty table cells fall back to the defaults
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return not value.strip()
+    return isinstance(value, float) and value != value
+
+
+def row_from_record(record):
+    if not isinstance(record, dict):
+        raise ValidationError(f"Every BOM row must be an object, got {record!r}.")
+    record = {str(k).strip().lower(): v for k, v in record.items()}
+    params = record.pop("params", None) or {}
+    if not isinstance(params, dict):
+        raise ValidationError(f"'params' must be an object, got {params!r}.")
+    params = dict(params)
+    component = record.pop("component", None)
+    if not component:
+        raise ValidationError("Every BOM row needs a 'component'.")
+    quantity, qty = record.pop("quantity", None), record.pop("qty", None)
+    if _blank(quantity):
+        quantity = 1 if _blank(qty) else qty
+    name = record.pop("name", None) or None
+    coords = [record.pop(axis, None) for axis in ("x", "y", "z", "rz")]
+    for key, value in record.items():
+        if not _blank(value):
+            params[key] = value
+    try:
+        quantity = int(float(quantity))
+        position = None
+        if not all(_blank(c) for c in coords):
+            position = tuple(0.0 if _blank(c) else float(c) for c in coords)
+    except (TypeError, ValueError):
+        raise ValidationError(f"Invalid quantity or position in {record!r}.")
+    if quantity < 1:
+        raise ValidationError(f"Quantity must be at least 1, got {quantity}.")
+    return BomRow(str(component).strip(), params, quantity, name, position)
+
+
+def read_bom(data, file_name=""):
+    """Parse CSV or JSON BOM data into rows."""
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    text = data.strip()
+    if file_name.lower().endswith(".json") or text.startswith(("[", "{")):
+        records = json.loads(text)
+        if isinstance(records, dict):
+            records = records.get("parts", [])
+        if not isinstance(records, list):
+            raise ValidationError("A JSON BOM must be a list of rows or an object with a 'parts' list.")
+    else:
+        records = list(csv.DictReader(io.StringIO(text)))
+    rows = []
+    for index, record in enumerate(records, 1):
+        try:
+            rows.append(row_from_record(record))
+        except ValidationError as e:
+            raise ValidationError(f"BOM row {index}: {e}") from None
+    return rows
+
+
+def run_batch(rows, engine, timeout=None, user=None):
+    """Build every unique part in ``rows`` and yield PartResults as they finish.
+
+    Rows with invalid parameters are reported as failures straight away;
+    they never stop the rest of the batch. Parts still unfinished after
+    ``timeout`` seconds are cancelled and reported as failed
+    (:data:`TIMED_OUT`). ``user`` is passed to the engine's admission
+    policy; parts are submitted only as fast as that user's queue takes
+    them, so a large batch waits instead of being refused.
+    """
+    parts = {}
+    for index, row in enumerate(rows, 1):
+        try:
+            comp, params = pipeline.prepare(row.component, row.params)
+        except ValidationError as e:
+            yield PartResult([index], row.component, row.quantity, row.name or "", state=FAILED, error=str(e))
+            continue
+        key = cache_key(comp.name, params)
+        if key not in parts:
+            parts[key] = PartResult([], comp.name, 0, row.name or comp.file_name(params), key=key, params=params)
+        result = parts[key]
+        result.rows.append(index)
+        result.quantity += row.quantity
+        result.positions += [row.position] * row.quantity
+
+    # parts are submitted as far as the user's admission queue allows; the rest follow as builds finish
+    waiting = deque(parts.values())
+    jobs = {}
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while waiting or jobs:
+            while waiting:
+                result = waiting[0]
+                try:
+                    jobs[engine.submit(result.component, result.params, user=user)] = result
+                except QueueFull as e:
+                    if jobs:
+                        break
+                    error = e  # the queue is held by the user's other requests
+                except Exception as e:
+                    error = e
+                else:
+                    waiting.popleft()
+                    continue
+                waiting.popleft()
+                result.state = FAILED
+                result.error = str(error)
+                if isinstance(error, ValidationError):
+                    result.refusal = error
+                yield result
+            if not jobs:
+                break
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            job_id = next(engine.as_completed(list(jobs), remaining))
+            result = jobs.pop(job_id)
+            status = engine.status(job_id)
+            engine.forget(job_id)
+            result.state = status.state
+            result.elapsed = status.elapsed
+            if status.state == DONE:
+                result.data = status.result.data
+                result.cached = status.result.cached
+            else:
+                result.error = status.error
+            yield result
+    except TimeoutError:
+        pass
+    finally:
+        # builds nobody will collect (timed out, or the caller stopped reading) are
+        # stopped, which also frees the user's admission slots
+        for job_id, result in jobs.items():
+            result.elapsed = engine.status(job_id).elapsed
+            engine.cancel(job_id)
+            engine.forget(job_id)
+    for result in list(jobs.values()) + list(waiting):
+        result.state = FAILED
+        result.error = TIMED_OUT
+        yield result
+
+
+def assembly_parts(results):
+    """AssemblyParts for every successful result, one instance per unit of quantity."""
+    return [AssemblyPart(r.component, r.params, r.name, r.positions or [None])
+            for r in results if r.ok]
+
+
+def report_csv(results):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["rows", "component", "file", "quantity", "status", "seconds", "cached", "error"])
+    for r in results:
+        writer.writerow([" ".join(map(str, r.rows)), r.component, r.name, r.quantity, r.state,
+                         f"{r.elapsed:.3f}", r.cached, r.error or ""])
+    return out.getvalue()
+
+
+class _ChunkBuffer:
+    # write-only file object: ZipFile falls back to streaming mode (data descriptors)
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _unique_name(name, key, used):
+    if name not in used:
+        return name
+    stem, dot, ext = name.rpartition(".")
+    return f"{stem}_{key[:8]}.{ext}" if dot else f"{name}_{key[:8]}"
+
+
+def iter_zip(results, extra=None):
+    """Yield a ZIP archive chunk by chunk, adding each part as its result arrives.
+
+    The archive ends with ``report.csv`` covering every part, failures
+    included, followed by any files ``extra(results)`` returns as a
+    {name: text} dict.
+    """
+    buffer = _ChunkBuffer()
+    seen = []
+    used = set()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for result in results:
+            seen.append(result)
+            if result.ok:
+                result.name = _unique_name(result.name, result.key, used)
+                used.add(result.name)
+                archive.writestr(result.name, result.data)
+            yield buffer.drain()
+        archive.writestr("report.csv", report_csv(seen))
+        for name, text in (extra(seen) if extra else {}).items():
+            archive.writestr(name, text)
+    yield buffer.drain()
@@ -0,0 +1,200 @@
+"""Benchmark every registered component over a representative parameter grid.
+
+Each case runs in a fresh worker process, so the peak RSS reported for it is
+the case's own, and every build starts from an empty shape cache
+(:func:`mechcad.shapes.isolated`), so cached thread segments or gear bodies
+never turn a timing into a cache hit. Build time (the OCC solid), STEP export time, peak RSS and
+STEP size are recorded separately and saved as JSON; a saved run can be used
+as the baseline for the next one, and cases that got slower, bigger or
+started failing are reported as regressions.
+"""
+import json
+import multiprocessing
+import os
+import platform
+import re
+import sys
+import time
+
+from mechcad.cache import library_versions
+
+TOLERANCE = 0.25  # relative slow-down or growth that counts as a regression
+MIN_SECONDS = 0.05  # ignore timing differences below this
+MIN_RSS_MB = 16.0
+
+# tag -> parameters; the middle entry of each is the UI default
+GEAR_GRID = {
+    "SpurGear": {
+        "small": {"module": 0.5, "teeth_number": 12, "width": 3.0, "bore_d": 2.0},
+        "default": {"module": 1.0, "teeth_number": 19, "width": 5.0, "bore_d": 5.0},
+        "large": {"module": 3.0, "teeth_number": 80, "width": 20.0, "bore_d": 20.0},
+    },
+    "BevelGear": {
+        "small": {"module": 0.5, "teeth_number": 15, "cone_angle": 45.0, "face_width": 3.0, "bore_d": 2.0},
+        "default": {"module": 1.0, "teeth_number": 25, "cone_angle": 45.0, "face_width": 8.0, "bore_d": 5.0},
+        "large": {"module": 2.0, "teeth_number": 60, "cone_angle": 30.0, "face_width": 15.0, "bore_d": 10.0},
+    },
+    "CrossedHelicalGear": {
+        "small": {"module": 0.5, "teeth_number": 12, "width": 5.0, "helix_angle": 20.0, "bore_d": 2.0},
+        "default": {"module": 1.0, "teeth_number": 20, "width": 10.0, "helix_angle": 45.0, "bore_d": 5.0},
+        "large": {"module": 2.0, "teeth_number": 60, "width": 20.0, "helix_angle": -30.0, "bore_d": 10.0},
+    },
+    "RackGear": {
+        "small": {"module": 0.5, "length": 50.0, "width": 5.0, "height": 3.0},
+        "default": {"module": 1.0, "length": 100.0, "width": 10.0, "height": 5.0},
+        "large": {"module": 2.0, "length": 300.0, "width": 20.0, "height": 10.0},
+    },
+    "RingGear": {
+        "small": {"module": 0.5, "teeth_number": 40, "width": 5.0, "rim_width": 2.0},
+        "default": {"module": 1.0, "teeth_number": 60, "width": 10.0, "rim_width": 5.0},
+        "large": {"module": 2.0, "teeth_number": 150, "width": 20.0, "rim_width": 8.0},
+    },
+    "Worm": {
+        "small": {"module": 0.5, "lead_angle": 5.0, "n_threads": 1, "length": 20.0, "bore_d": 2.0},
+        "default": {"module": 1.0, "lead_angle": 10.0, "n_threads": 1, "length": 50.0, "bore_d": 8.0},
+        "large": {"module": 2.0, "lead_angle": 20.0, "n_threads": 3, "length": 120.0, "bore_d": 10.0},
+    },
+}
+
+
+def _preferred_type(types):
+    metric = [t for t in types if t.startswith("iso")]
+    return (metric or types)[0]
+
+
+def cases(pattern=None):
+    """The benchmark grid as a list of {"id", "component", "params"}.
+
+    Catalog parts use the smallest and largest size of their (preferably ISO)
+    type; nuts and screws are run both with and without threads.
+    """
+    from mechcad.catalog import get_catalog, size_dimensions
+    from mechcad.registry import REGISTRY
+    catalog = get_catalog()
+    grid = []
+    for comp in REGISTRY.values():
+        if comp.category == "Gear":
+            for tag, params in GEAR_GRID.get(comp.name, {}).items():
+                grid.append({"id": f"{comp.name}[{tag}]", "component": comp.name, "params": params})
+            continue
+        if comp.name not in catalog.components:
+            continue
+        fastener_type = _preferred_type(catalog.types(comp.name))
+        sizes = catalog.sizes(comp.name, fastener_type)
+        for tag, size in (("smallest", sizes[0]), ("largest", sizes[-1])):
+            params = {"size": size}
+            if comp.category == "Bearing":
+                grid.append({"id": f"{comp.name}[{tag}]", "component": comp.name, "params": params})
+                continue
+            params["fastener_type"] = fastener_type
+            if comp.category == "Screw":
+                diameter = size_dimensions(comp.category, size).get("diameter", 5.0)
+                params["length"] = float(max(round(3 * diameter), 6))
+            if comp.category == "Washer":
+                grid.append({"id": f"{comp.name}[{tag}]", "component": comp.name, "params": params})
+                continue
+            for simple in (True, False):
+                variant = "simple" if simple else "threaded"
+                grid.append({"id": f"{comp.name}[{tag},{variant}]", "component": comp.name,
+                             "params": dict(params, simple=simple)})
+    if pattern:
+        grid = [case for case in grid if re.search(pattern, case["id"])]
+    return grid
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_case(case, repeat):
+    from mechcad import engine
+    engine._warm_worker()
+    from mechcad import pipeline, shapes
+    from mechcad.export import to_shape, to_step_bytes
+    row = dict(case, import_s=engine._import_seconds, rss_import_mb=_peak_rss_mb())
+    try:
+        comp, params = pipeline.prepare(case["component"], case["params"])
+        builds, exports = [], []
+        for _ in range(repeat):
+            with shapes.isolated():
+                start = time.perf_counter()
+                shape = to_shape(comp.build(params))
+                builds.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            data = to_step_bytes(shape)
+            exports.append(time.perf_counter() - start)
+        row.update(build_s=min(builds), export_s=min(exports), step_bytes=len(data), error=None)
+    except Exception as e:
+        row.update(build_s=None, export_s=None, step_bytes=None, error=f"{type(e).__name__}: {e}")
+    row["peak_rss_mb"] = _peak_rss_mb()
+    return row
+
+
+def run(grid, repeat=1, progress=None):
+    """Run every case of ``grid`` in its own process, one at a time, and return the results document."""
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        for case in grid:
+            row = pool.apply(_run_case, (case, repeat))
+            rows.append(row)
+            if progress is not None:
+                progress(row)
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "repeat": repeat,
+            "cold_builds": True,  # every build ran with an empty shape cache
+            "versions": library_versions(),
+        },
+        "cases": rows,
+    }
+
+
+def save(results, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _grew(new, old, tolerance, minimum):
+    return new is not None and old is not None and new > old * (1 + tolerance) and new - old > minimum
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Regressions of ``results`` against ``baseline`` as human-readable strings."""
+    previous = {row["id"]: row for row in baseline["cases"]}
+    regressions = []
+    for row in results["cases"]:
+        old = previous.get(row["id"])
+        if old is None:
+            continue
+        if row["error"] and not old["error"]:
+            regressions.append(f"{row['id']}: now fails ({row['error']})")
+            continue
+        for metric, minimum in (("build_s", MIN_SECONDS), ("export_s", MIN_SECONDS),
+                                ("peak_rss_mb", MIN_RSS_MB), ("step_bytes", 0)):
+            if _grew(row.get(metric), old.get(metric), tolerance, minimum):
+                regressions.append(f"{row['id']}: {metric} {old[metric]:.4g} -> {row[metric]:.4g}")
+    return regressions
+
+
+def format_row(row):
+    if row["error"]:
+        return f"{row['id']:<55} FAILED: {row['error']}"
+    return (f"{row['id']:<55} build {row['build_s']:8.3f} s  export {row['export_s']:7.3f} s  "
+            f"peak {row['peak_rss_mb'] or 0:7.1f} MB  step {row['step_bytes'] / 1024:9.1f} KiB")
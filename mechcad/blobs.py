@@ -0,0 +1,54 @@
+"""Shared store for the file bytes handed to UI sessions.
+
+Sessions keep only the SHA-256 of a generated file; the bytes are written
+once to a size-bounded directory on local disk (indexed and evicted like
+the part cache) and read back through a file handle when a download
+button is drawn. Identical files from any number of sessions share one
+copy on disk. Streamlit still copies a file into its in-memory media
+store while its button is on screen, so only the bytes of the buttons
+currently displayed are held in memory, not every file a session made.
+"""
+import functools
+import hashlib
+import os
+
+from mechcad.cache import PartCache, default_cache
+
+FMT = "blob"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class BlobStore:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self._files = PartCache(directory, max_bytes)
+
+    @property
+    def directory(self):
+        return self._files.directory
+
+    def put(self, data):
+        """Store ``data`` (if it is not stored already) and return its digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        if not os.path.exists(self._files.path(digest, FMT)):
+            self._files.put(digest, data, fmt=FMT)
+        return digest
+
+    def open(self, digest):
+        """A binary file object of the blob, or None if it was evicted."""
+        return self._files.open(digest, FMT)
+
+    def size(self, digest):
+        try:
+            return os.path.getsize(self._files.path(digest, FMT))
+        except FileNotFoundError:
+            return None
+
+    def stats(self):
+        return self._files.stats()
+
+
+@functools.lru_cache(maxsize=None)
+def default_blobs():
+    directory = os.environ.get("MECHCAD_BLOB_DIR") or os.path.join(default_cache().directory, "blobs")
+    max_mb = os.environ.get("MECHCAD_BLOB_MAX_MB")
+    return BlobStore(directory, int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES)
@@ -0,0 +1,183 @@
+"""Content-addressed on-disk cache for generated part files.
+
+Every entry is stored as ``<key>.<fmt>`` in a single directory. The index
+(entry sizes and last access times) and the hit/miss counters live in a
+SQLite database next to the files, so all Streamlit sessions and worker
+processes on the host share one cache and one set of counters.
+"""
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from importlib import metadata
+
+LIBRARIES = ("cadquery", "cq_gears", "cq_warehouse")
+
+# bump whenever mechcad's own geometry code changes, so stale cached parts are not served
+GEOMETRY_VERSION = 3  # 2: square-ended thread segments, 3: gear bores cut from cached bodies
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "mechcad-cache")
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+@functools.lru_cache(maxsize=None)
+def library_versions():
+    versions = {}
+    for name in LIBRARIES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def normalize(value):
+    if hasattr(value, "item"):  # numpy scalars coming from widgets or sweeps
+        value = value.item()
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        # 10, 10.0 and 10.000000000001 must all hash the same
+        return float(format(float(value), ".10g"))
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(k): normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    return str(value)
+
+
+def cache_key(component, params):
+    """Hash of the component, its normalized parameters, the CAD library versions and GEOMETRY_VERSION."""
+    payload = {
+        "component": component,
+        "params": normalize(params),
+        "versions": library_versions(),
+        "geometry": GEOMETRY_VERSION,
+    }
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class PartCache:
+    """Size-bounded LRU cache of file payloads shared between processes."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._db_path = os.path.join(directory, "index.sqlite3")
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS entries ("
+                     "key TEXT NOT NULL, fmt TEXT NOT NULL, size INTEGER NOT NULL, "
+                     "last_access REAL NOT NULL, PRIMARY KEY (key, fmt))")
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._db_path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, amount=1):
+        self._connect().execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, amount))
+
+    def path(self, key, fmt="step"):
+        return os.path.join(self.directory, f"{key}.{fmt}")
+
+    def open(self, key, fmt="step", count=True):
+        """An open binary file of the entry, or None; lets large entries be streamed or mapped.
+
+        ``count=False`` leaves the hit/miss counters alone, for internal lookups of
+        intermediate entries (shapes, STEP read back to compress) made while serving
+        a request that was already counted.
+        """
+        try:
+            f = open(self.path(key, fmt), "rb")
+        except FileNotFoundError:
+            self._connect().execute("DELETE FROM entries WHERE key = ? AND fmt = ?", (key, fmt))
+            if count:
+                self._count("misses")
+            return None
+        self._connect().execute("UPDATE entries SET last_access = ? WHERE key = ? AND fmt = ?",
+                                (time.time(), key, fmt))
+        if count:
+            self._count("hits")
+        return f
+
+    def get(self, key, fmt="step", count=True):
+        f = self.open(key, fmt, count)
+        if f is None:
+            return None
+        with f:
+            return f.read()
+
+    def put(self, key, data, fmt="step"):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path(key, fmt))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._connect().execute("INSERT OR REPLACE INTO entries (key, fmt, size, last_access) VALUES (?, ?, ?, ?)",
+                                (key, fmt, len(data), time.time()))
+        self._evict()
+
+    def _evict(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            evicted = 0
+            while total > self.max_bytes:
+                row = conn.execute("SELECT key, fmt, size FROM entries ORDER BY last_access LIMIT 1").fetchone()
+                if row is None:
+                    break
+                key, fmt, size = row
+                conn.execute("DELETE FROM entries WHERE key = ? AND fmt = ?", (key, fmt))
+                try:
+                    os.remove(self.path(key, fmt))
+                except FileNotFoundError:
+                    pass
+                total -= size
+                evicted += 1
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if evicted:
+            self._count("evictions", evicted)
+
+    def stats(self):
+        conn = self._connect()
+        counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0),
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+@functools.lru_cache(maxsize=None)
+def default_cache():
+    directory = os.environ.get("MECHCAD_CACHE_DIR", DEFAULT_CACHE_DIR)
+    max_mb = os.environ.get("MECHCAD_CACHE_MAX_MB")
+    max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+    return PartCache(directory, max_bytes)
@@ -0,0 +1,176 @@
+"""Precomputed index of every catalog part: component -> type -> sizes.
+
+cq_warehouse re-reads its CSV tables each time ``types()`` or ``sizes()`` is
+called. The index is built once per process, or loaded from a JSON snapshot
+written next to the part cache, and answers dropdown and search queries from
+memory. Key dimensions are decoded from the size designations
+(``M8-22-7`` bearings, ``M3-0.5`` / ``M5`` / ``#4-40`` / ``1/4-20``
+fasteners).
+"""
+import bisect
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from fractions import Fraction
+
+from mechcad.cache import default_cache, library_versions
+
+INCH = 25.4
+
+_BEARING_SIZE = re.compile(r"^M?(\d+(?:\.\d+)?)-(\d+(?:\.\d+)?)-(\d+(?:\.\d+)?)$")
+_METRIC_SIZE = re.compile(r"^M(\d+(?:\.\d+)?)(?:-(\d+(?:\.\d+)?))?$")
+_IMPERIAL_SIZE = re.compile(r"^(#\d+|\d+(?:/\d+)?|\d+ \d+/\d+)-(\d+)$")
+
+logger = logging.getLogger(__name__)
+
+_build_lock = threading.Lock()
+
+
+def size_dimensions(category, size):
+    """Key dimensions in mm encoded in a size designation, or {} if unknown."""
+    size = size.strip()
+    if category == "Bearing":
+        match = _BEARING_SIZE.match(size)
+        if match:
+            d, outer, width = map(float, match.groups())
+            return {"d": d, "D": outer, "B": width}
+        return {}
+    match = _METRIC_SIZE.match(size)
+    if match:
+        diameter, pitch = match.groups()
+        # washers are sized by the bare thread diameter ("M5")
+        return {"diameter": float(diameter)} if pitch is None else {"diameter": float(diameter), "pitch": float(pitch)}
+    match = _IMPERIAL_SIZE.match(size)
+    if match:
+        nominal, tpi = match.groups()
+        if nominal.startswith("#"):
+            inches = 0.060 + 0.013 * int(nominal[1:])
+        else:
+            inches = float(sum(Fraction(part) for part in nominal.split()))
+        return {"diameter": round(inches * INCH, 3), "pitch": round(INCH / int(tpi), 4)}
+    return {}
+
+
+def _words(text):
+    return [w for w in re.split(r"[\s_]+", text.lower()) if w]
+
+
+class Catalog:
+    def __init__(self, components, failed=()):
+        # components: {name: {"label", "category", "types": {type: [sizes]}}}
+        self.components = components
+        self.failed = list(failed)  # components whose tables could not be read
+        self.records = []
+        for name, info in components.items():
+            for fastener_type, sizes in info["types"].items():
+                for size in sizes:
+                    self.records.append({
+                        "component": name, "label": info["label"], "category": info["category"],
+                        "type": fastener_type, "size": size,
+                        "dims": size_dimensions(info["category"], size),
+                    })
+        self._words = sorted(
+            (word, index)
+            for index, record in enumerate(self.records)
+            for word in set(_words(f"{record['label']} {record['component']} {record['type']} {record['size']}"))
+        )
+        self._keys = [word for word, _ in self._words]
+
+    @classmethod
+    def build(cls):
+        from mechcad import pipeline  # noqa: F401  (registers the built-in parts)
+        from mechcad.registry import REGISTRY
+        components = {}
+        failed = []
+        for comp in REGISTRY.values():
+            if comp.category == "Gear":
+                continue
+            # one unreadable table only drops that component from the index
+            try:
+                if comp.category == "Bearing":
+                    types = {"SKT": list(comp.cls.sizes("SKT"))}
+                else:
+                    types = {t: list(comp.cls.sizes(t)) for t in sorted(comp.cls.types())}
+            except Exception:
+                logger.exception("could not index the sizes of %s", comp.name)
+                failed.append(comp.name)
+                continue
+            components[comp.name] = {"label": comp.label, "category": comp.category, "types": types}
+        return cls(components, failed)
+
+    def to_json(self):
+        return json.dumps({"versions": library_versions(), "components": self.components})
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        if data.get("versions") != library_versions():
+            raise ValueError("catalog snapshot was built with different library versions")
+        return cls(data["components"])
+
+    def types(self, component):
+        return list(self.components[component]["types"])
+
+    def sizes(self, component, fastener_type):
+        return list(self.components[component]["types"].get(fastener_type, ()))
+
+    def _prefix(self, token):
+        lo = bisect.bisect_left(self._keys, token)
+        hi = bisect.bisect_left(self._keys, token + "\uffff")
+        return {index for _, index in self._words[lo:hi]}
+
+    def search(self, query, category=None, limit=50):
+        """Records whose words start with every token of ``query``."""
+        matches = None
+        for token in _words(query):
+            found = self._prefix(token)
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+        indices = range(len(self.records)) if matches is None else sorted(matches)
+        results = []
+        for index in indices:
+            record = self.records[index]
+            if category is None or record["category"] == category:
+                results.append(record)
+                if len(results) >= limit:
+                    break
+        return results
+
+
+def snapshot_path():
+    digest = hashlib.sha256(json.dumps(library_versions(), sort_keys=True).encode()).hexdigest()[:12]
+    return os.path.join(default_cache().directory, f"catalog-{digest}.json")
+
+
+def get_catalog():
+    """The process-wide catalog, from the snapshot when one matches the installed libraries."""
+    # concurrent first callers (pre-warm thread, UI sessions) wait for one build
+    with _build_lock:
+        return _load_catalog()
+
+
+@functools.lru_cache(maxsize=None)
+def _load_catalog():
+    path = snapshot_path()
+    try:
+        with open(path, encoding="utf-8") as f:
+            return Catalog.from_json(f.read())
+    except (OSError, ValueError, KeyError):
+        pass
+    catalog = Catalog.build()
+    if catalog.failed:
+        # do not persist an incomplete index; the next process tries again
+        return catalog
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(catalog.to_json())
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return catalog
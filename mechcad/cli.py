@@ -0,0 +1,457 @@
+"""Headless entry points: ``python -m mechcad generate|batch|sweep|gearset|warmup|bench|serve``.
+
+Nothing here imports Streamlit. Parts go through the same pipeline, on-disk
+cache and worker engine as the UI.
+"""
+import argparse
+import json
+import sys
+from concurrent.futures import TimeoutError
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_TIMEOUT = 300.0
+RETRY_AFTER = 10  # seconds a client with a full build queue is asked to wait
+
+
+def parse_params(pairs):
+    params = {}
+    for pair in pairs or ():
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"Parameters must look like key=value, got {pair!r}")
+        params[key.strip()] = value
+    return params
+
+
+def component_schema():
+    from mechcad import pipeline  # noqa: F401  (registers the built-in parts)
+    from mechcad.registry import REGISTRY
+    return [{
+        "name": c.name, "label": c.label, "category": c.category,
+        "params": [{"name": p.name, "label": p.label, "kind": p.kind, "default": p.default,
+                    "min": p.min_value, "max": p.max_value} for p in c.params],
+    } for c in REGISTRY.values()]
+
+
+def cmd_components(args):
+    json.dump(component_schema(), sys.stdout, indent=2)
+    print()
+
+
+def cmd_generate(args):
+    from mechcad import pipeline
+    from mechcad.registry import ValidationError
+    try:
+        result = pipeline.generate(args.component, parse_params(args.param), fmt=args.format,
+                                   tolerance=args.tolerance)
+    except ValidationError as e:
+        raise SystemExit(f"error: {e}")
+    out = args.output or result.name
+    if out == "-":
+        sys.stdout.buffer.write(result.data)
+    else:
+        with open(out, "wb") as f:
+            f.write(result.data)
+        source = "cache" if result.cached else "built"
+        print(f"{out}: {len(result.data)} bytes ({source})", file=sys.stderr)
+
+
+def cmd_sweep(args):
+    from mechcad import batch, sweep
+    from mechcad.engine import GenerationEngine
+    from mechcad.registry import ValidationError
+    try:
+        family = sweep.expand(args.component, parse_params(args.param))
+    except ValidationError as e:
+        raise SystemExit(f"error: {e}")
+    valid = int(family.valid.sum())
+    print(f"{len(family.names)} combinations, {valid} valid, {len(family.names) - valid} pruned", file=sys.stderr)
+    if args.dry_run:
+        sys.stdout.write(sweep.manifest_csv(family))
+        return
+    engine = GenerationEngine(max_workers=args.workers)
+    results = []
+
+    def report(results_iter):
+        for result in results_iter:
+            results.append(result)
+            if not result.ok:
+                print(f"{result.name}: FAILED: {result.error}", file=sys.stderr)
+            yield result
+
+    try:
+        with open(args.output, "wb") as f:
+            for chunk in sweep.iter_archive(family, report(batch.run_batch(family.rows(), engine, args.timeout))):
+                f.write(chunk)
+    finally:
+        engine.shutdown()
+    failed = sum(1 for r in results if not r.ok)
+    print(f"{args.output}: {len(results) - failed} gears, {failed} failed", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+def cmd_gearset(args):
+    from mechcad import geartrain
+    from mechcad.engine import GenerationEngine, GenerationError
+    from mechcad.registry import ValidationError
+    try:
+        _, _, plan = geartrain.layout(args.kind, parse_params(args.param))
+    except ValidationError as e:
+        raise SystemExit(f"error: {e}")
+    for label, value in plan.info.items():
+        print(f"{label}: {value:g}", file=sys.stderr)
+    engine = GenerationEngine(max_workers=args.workers)
+    try:
+        result = geartrain.generate(engine, args.kind, parse_params(args.param), args.timeout)
+    except (GenerationError, TimeoutError) as e:
+        raise SystemExit(f"error: {e}")
+    finally:
+        engine.shutdown()
+    out = args.output or result.name
+    with open(out, "wb") as f:
+        f.write(result.data)
+    print(f"{out}: {len(plan.rows)} gears, {len(result.data)} bytes", file=sys.stderr)
+
+
+def cmd_warmup(args):
+    from mechcad import warmup
+    from mechcad.engine import GenerationEngine
+    rows = warmup.warmup_rows(args.parts, args.top, args.history, defaults=not args.no_defaults)
+    engine = GenerationEngine(max_workers=args.workers, record_history=False)
+
+    def progress(result):
+        if not result.ok:
+            print(f"FAILED {result.component} {result.params or ''}: {result.error}", file=sys.stderr)
+
+    try:
+        report = warmup.run_warmup(rows, engine, progress)
+    finally:
+        engine.shutdown()
+    print(f"warm-up: {report.parts} unique parts, {report.built} built, {report.cached} already cached, "
+          f"{len(report.failures)} failed in {report.seconds:.1f} s", file=sys.stderr)
+    if report.failures and args.strict:
+        sys.exit(1)
+
+
+def cmd_bench(args):
+    from mechcad import bench
+    grid = bench.cases(args.only)
+    print(f"benchmarking {len(grid)} cases", file=sys.stderr)
+    results = bench.run(grid, args.repeat, lambda row: print(bench.format_row(row), file=sys.stderr))
+    bench.save(results, args.output)
+    print(f"results written to {args.output}", file=sys.stderr)
+    if args.calibrate:
+        from mechcad.admission import CostModel, bench_path
+        model = CostModel.from_bench(results)
+        bench.save(results, bench_path())
+        print(f"build-time estimates for {len(model.coefficients)} components will be calibrated from "
+              f"{bench_path()}", file=sys.stderr)
+    if args.baseline:
+        baseline = bench.load(args.baseline)
+        if baseline["meta"]["versions"] != results["meta"]["versions"]:
+            print("warning: the baseline was recorded with different library versions", file=sys.stderr)
+        regressions = bench.compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+def cmd_batch(args):
+    from mechcad import batch
+    from mechcad.engine import GenerationEngine
+    with open(args.bom, "rb") as f:
+        rows = batch.read_bom(f.read(), args.bom)
+    engine = GenerationEngine(max_workers=args.workers)
+    try:
+        results = []
+
+        def report(results_iter):
+            for result in results_iter:
+                results.append(result)
+                status = "ok" if result.ok else f"FAILED: {result.error}"
+                print(f"{result.name or result.component}: {status} ({result.elapsed:.2f} s)", file=sys.stderr)
+                yield result
+
+        with open(args.output, "wb") as f:
+            for chunk in batch.iter_zip(report(batch.run_batch(rows, engine, args.timeout))):
+                f.write(chunk)
+        if args.assembly:
+            job_id = engine.submit_assembly(batch.assembly_parts(results))
+            with open(args.assembly, "wb") as f:
+                f.write(engine.result(job_id, args.timeout).data)
+    finally:
+        engine.shutdown()
+    if any(not r.ok for r in results):
+        sys.exit(1)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MechCAD"
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send(status, {"error": message})
+
+    def _invalid(self, e):
+        # admission refusals are not bad input: a full queue is worth retrying, a too expensive part is not
+        from mechcad.admission import QueueFull, TooExpensive
+        if isinstance(e, QueueFull):
+            self._send(HTTPStatus.TOO_MANY_REQUESTS, {"error": str(e)}, headers={"Retry-After": str(RETRY_AFTER)})
+        elif isinstance(e, TooExpensive):
+            self._send(HTTPStatus.UNPROCESSABLE_ENTITY, {"error": str(e), "estimate_seconds": round(e.seconds, 1)})
+        else:
+            self._error(HTTPStatus.BAD_REQUEST, str(e))
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length)
+
+    def _spec(self):
+        spec = json.loads(self._body() or b"{}")
+        if not isinstance(spec, dict):
+            raise ValueError("The request body must be a JSON object")
+        if not isinstance(spec.get("params") or {}, dict):
+            raise ValueError("'params' must be a JSON object")
+        return spec
+
+    def _user(self):
+        # the admission policy caps concurrent builds per user: the client address, or the
+        # header named by --user-header, which a trusted reverse proxy must set on every request
+        header = self.server.user_header
+        return (header and self.headers.get(header)) or self.client_address[0]
+
+    def _timeout(self):
+        try:
+            return min(float(self.headers.get("X-Timeout", self.server.timeout_s)), self.server.timeout_s)
+        except ValueError:
+            return self.server.timeout_s
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(HTTPStatus.OK, {"status": "ok"})
+        elif self.path == "/components":
+            self._send(HTTPStatus.OK, self.server.schema)
+        elif self.path == "/cache":
+            self._send(HTTPStatus.OK, self.server.engine.cache.stats())
+        elif self.path == "/metrics":
+            self._send(HTTPStatus.OK, dict(self.server.engine.metrics.summary(),
+                                           admission=self.server.engine.admission.stats()))
+        else:
+            self._error(HTTPStatus.NOT_FOUND, f"Unknown path {self.path}")
+
+    def do_POST(self):
+        if self.path == "/generate":
+            self._generate()
+        elif self.path == "/batch":
+            self._batch()
+        elif self.path == "/sweep":
+            self._sweep()
+        elif self.path == "/gearset":
+            self._gearset()
+        else:
+            self._error(HTTPStatus.NOT_FOUND, f"Unknown path {self.path}")
+
+    def _generate(self):
+        from mechcad.registry import ValidationError
+        try:
+            spec = self._spec()
+            fmt = spec.get("format", "step")
+            # plain STEP is sent gzip-encoded to clients that accept it
+            encoded = fmt == "step" and "gzip" in self.headers.get("Accept-Encoding", "")
+            job_id = self.server.engine.submit(spec.get("component", ""), spec.get("params") or {},
+                                               "step.gz" if encoded else fmt, spec.get("tolerance"), self._user())
+        except (ValueError, TypeError, ValidationError) as e:
+            return self._invalid(e)
+        engine = self.server.engine
+        try:
+            result = engine.result(job_id, self._timeout())
+        except TimeoutError:
+            # nobody will collect the result, so stop the build
+            engine.cancel(job_id)
+            return self._error(HTTPStatus.GATEWAY_TIMEOUT, "Generation timed out")
+        except Exception as e:
+            return self._error(HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
+        finally:
+            engine.forget(job_id)
+        from mechcad.pipeline import FORMATS
+        headers = {"X-Cache": "hit" if result.cached else "miss"}
+        if encoded:
+            headers["Content-Encoding"] = "gzip"
+            headers["Content-Disposition"] = f'attachment; filename="{result.name[:-len(".gz")]}"'
+        else:
+            headers["Content-Disposition"] = f'attachment; filename="{result.name}"'
+        self._send(HTTPStatus.OK, result.data, FORMATS[fmt], headers)
+
+    def _batch(self):
+        from mechcad import batch
+        from mechcad.registry import ValidationError
+        try:
+            rows = batch.read_bom(self._body(), self.headers.get("X-Filename", ""))
+            # parts refused later are reported in report.csv; a queue that is full from the start refuses it all
+            self.server.engine.admission.check_queue(self._user())
+        except (ValueError, ValidationError) as e:
+            return self._invalid(e)
+        self._stream_zip(batch.iter_zip(batch.run_batch(rows, self.server.engine, self._timeout(), self._user())),
+                         "mechcad_bom.zip")
+
+    def _sweep(self):
+        from mechcad import batch, sweep
+        from mechcad.registry import ValidationError
+        try:
+            spec = self._spec()
+            family = sweep.expand(spec.get("component", ""), spec.get("params") or {})
+            self.server.engine.admission.check_queue(self._user())
+        except (ValueError, TypeError, ValidationError) as e:
+            return self._invalid(e)
+        self._stream_zip(sweep.iter_archive(family, batch.run_batch(family.rows(), self.server.engine,
+                                                                   self._timeout(), self._user())),
+                         "mechcad_sweep.zip")
+
+    def _gearset(self):
+        from mechcad import geartrain
+        from mechcad.registry import ValidationError
+        try:
+            spec = self._spec()
+            geartrain.layout(spec.get("type", ""), spec.get("params") or {})
+            self.server.engine.admission.check_queue(self._user())
+        except (ValueError, TypeError, ValidationError) as e:
+            return self._invalid(e)
+        try:
+            result = geartrain.generate(self.server.engine, spec["type"], spec.get("params") or {}, self._timeout(),
+                                        self._user())
+        except TimeoutError:
+            return self._error(HTTPStatus.GATEWAY_TIMEOUT, "Generation timed out")
+        except ValidationError as e:
+            # a member or the assembly was refused by admission control
+            return self._invalid(e)
+        except Exception as e:
+            return self._error(HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
+        self._send(HTTPStatus.OK, result.data, "application/step",
+                   {"Content-Disposition": f'attachment; filename="{result.name}"'})
+
+    def _stream_zip(self, chunks, file_name):
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Disposition", f'attachment; filename="{file_name}"')
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        # parts are written to the client as they finish; timed-out parts are listed in report.csv
+        for chunk in chunks:
+            if chunk:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def cmd_serve(args):
+    from mechcad.engine import GenerationEngine
+    engine = GenerationEngine(max_workers=args.workers)
+    engine.warm()
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    server.engine = engine
+    server.schema = component_schema()
+    server.timeout_s = args.timeout
+    server.user_header = args.user_header
+    print(f"Serving on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        engine.shutdown(wait=False)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="mechcad", description="Generate standard mechanical parts as STEP files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("components", help="list components and their parameters as JSON")
+    p.set_defaults(func=cmd_components)
+
+    p = sub.add_parser("generate", help="generate one part")
+    p.add_argument("component", help="class name or label, e.g. HexNut or 'Spur Gear'")
+    p.add_argument("-p", "--param", action="append", metavar="KEY=VALUE", help="component parameter (repeatable)")
+    p.add_argument("-o", "--output", help="output file, '-' for stdout (default: the part's file name)")
+    p.add_argument("-f", "--format", default="step", choices=["step", "step.gz", "stl", "glb"])
+    p.add_argument("--tolerance", type=float, default=0.1, help="mesh tolerance in mm for stl and glb (0.005 to 5)")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("batch", help="generate every part of a CSV/JSON BOM into a ZIP")
+    p.add_argument("bom")
+    p.add_argument("-o", "--output", default="mechcad_bom.zip")
+    p.add_argument("--assembly", metavar="FILE", help="also write all parts as one STEP assembly")
+    p.add_argument("--workers", type=int)
+    p.add_argument("--timeout", type=float, default=None, help="seconds before the batch gives up")
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("sweep", help="generate a gear family from parameter ranges into a ZIP")
+    p.add_argument("component", help="gear class name or label, e.g. SpurGear")
+    p.add_argument("-p", "--param", action="append", metavar="KEY=VALUES",
+                   help="a value, a list (0.5,1,1.5) or an inclusive range (12:80 or 12:80:2); repeatable")
+    p.add_argument("-o", "--output", default="mechcad_sweep.zip")
+    p.add_argument("--dry-run", action="store_true", help="print the manifest of valid and pruned combinations only")
+    p.add_argument("--workers", type=int)
+    p.add_argument("--timeout", type=float, default=None, help="seconds before the sweep gives up")
+    p.set_defaults(func=cmd_sweep)
+
+    p = sub.add_parser("gearset", help="generate meshing gears positioned in one STEP assembly")
+    p.add_argument("kind", help="spur_pair, bevel_pair, worm_pair or planetary")
+    p.add_argument("-p", "--param", action="append", metavar="KEY=VALUE", help="gear set parameter (repeatable)")
+    p.add_argument("-o", "--output", help="output file (default: <kind>.step)")
+    p.add_argument("--workers", type=int)
+    p.add_argument("--timeout", type=float, default=None, help="seconds before generation gives up")
+    p.set_defaults(func=cmd_gearset)
+
+    p = sub.add_parser("warmup", help="pre-build popular parts into the cache")
+    p.add_argument("--parts", metavar="BOM", help="CSV/JSON list of extra parts to pre-build")
+    p.add_argument("--top", type=int, default=0, metavar="N", help="also pre-build the N most requested parts")
+    p.add_argument("--history", metavar="FILE", help="request log to rank parts by (default: the cache's log)")
+    p.add_argument("--no-defaults", action="store_true", help="skip the built-in list of popular parts")
+    p.add_argument("--workers", type=int)
+    p.add_argument("--strict", action="store_true", help="exit non-zero if any part fails")
+    p.set_defaults(func=cmd_warmup)
+
+    p = sub.add_parser("bench", help="time build, export, memory and STEP size of every component")
+    p.add_argument("-o", "--output", default="bench.json", help="where to save the results (JSON)")
+    p.add_argument("--baseline", metavar="FILE", help="earlier results to compare against; regressions exit 1")
+    p.add_argument("--only", metavar="REGEX", help="run only cases whose id matches, e.g. 'Gear|HexNut'")
+    p.add_argument("--repeat", type=int, default=1, help="builds per case; the fastest is kept")
+    p.add_argument("--tolerance", type=float, default=0.25, help="relative growth that counts as a regression")
+    p.add_argument("--calibrate", action="store_true",
+                   help="also save the results where the build-time estimator reads its calibration")
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser("serve", help="serve the generation API over HTTP")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--workers", type=int)
+    p.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="per-request limit in seconds")
+    p.add_argument("--user-header", metavar="NAME",
+                   help="identify users for the per-user build limits by this header (e.g. X-Forwarded-User) "
+                        "instead of the client address; only when a reverse proxy sets it")
+    p.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Built-in bearings, gears and fasteners.
+
+Registering components imports nothing from the CAD stack: cadquery,
+cq_gears and cq_warehouse are imported by the build functions (and by
+``Component.cls``) the first time they are needed. Toothed gear bodies and
+thread segments are reused across parts through :mod:`mechcad.shapes`.
+"""
+import importlib
+
+from mechcad import gearmath, threads
+from mechcad.registry import Component, Param, register
+from mechcad.shapes import default_shapes
+
+
+def _safe(text):
+    return str(text).replace("/", "_")
+
+
+def _load(source):
+    module, _, name = source.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def _workplane(obj):
+    import cadquery as cq
+    return cq.Workplane('XY').add(obj)
+
+
+def _gear(name):
+    return _load(f"cq_gears:{name}")
+
+
+def _bored_gear(name, bore_d, **tooth):
+    # the toothed body is cached without a bore, so a bore change costs one cut
+    import cadquery as cq
+    body = default_shapes().get(f"{name}Body", tooth, lambda: _gear(name)(**tooth).build())
+    if not bore_d:
+        return body
+    bb = body.BoundingBox()
+    return body.cut(cq.Solid.makeCylinder(bore_d / 2, bb.zlen + 2, cq.Vector(0, 0, bb.zmin - 1)))
+
+#-----------------------------------------------Bearing------------------------------------------------------------------
+
+BEARING_CLASSES = {
+    "Single Row Deep Groove Ball Bearing": "SingleRowDeepGrooveBallBearing",
+    "Single Row Capped DeepGrooveBall Bearing": "SingleRowCappedDeepGrooveBallBearing",
+    "Single Row Angular Contact BallBearing": "SingleRowAngularContactBallBearing",
+    "Single Row Cylindrical Roller Bearing": "SingleRowCylindricalRollerBearing",
+    "Single Row Tapered Roller Bearing": "SingleRowTaperedRollerBearing"
+}
+
+BEARING_PARAMS = (
+    Param("size", "Bearing Size", kind="str"),
+    Param("bearing_type", "Bearing Type", kind="str", default="SKT"),
+)
+
+for _label, _name in BEARING_CLASSES.items():
+    register(Component(
+        name=_name, label=_label, category="Bearing", params=BEARING_PARAMS,
+        source=f"cq_warehouse.bearing:{_name}",
+        build=lambda p, source=f"cq_warehouse.bearing:{_name}": _load(source)(
+            size=p["size"], bearing_type=p["bearing_type"]).cq_object,
+        file_name=lambda p, label=_label: f"{label}_{_safe(p['size'])}.step",
+    ))
+
+#-----------------------------------------------------------Gear----------------------------------------------------------------------------
+
+MODULE = Param("module", "Module", default=1.0, min_value=0.1, step=0.1)
+
+register(Component(
+    name="SpurGear", label="Spur Gear", category="Gear", source="cq_gears:SpurGear",
+    params=(
+        MODULE,
+        Param("teeth_number", "Number of Teeth", kind="int", default=19, min_value=3, step=1),
+        Param("width", "Thickness (mm)", default=5.0, min_value=0.1, step=0.5),
+        Param("bore_d", "Bore Diameter (mm)", default=5.0, min_value=0.0, step=0.5),
+    ),
+    validate=lambda p: gearmath.check("SpurGear", p),
+    build=lambda p: _bored_gear("SpurGear", p["bore_d"], module=p["module"], teeth_number=p["teeth_number"],
+                                width=p["width"]),
+    file_name=lambda p: "spur_gear.step",
+))
+
+register(Component(
+    name="BevelGear", label="Bevel Gear", category="Gear", source="cq_gears:BevelGear",
+    params=(
+        MODULE,
+        Param("teeth_number", "Number of Teeth", kind="int", default=25, min_value=5, step=1),
+        Param("cone_angle", "Cone Angle (°)", default=45.0, min_value=1.0, max_value=179.0, step=1.0),
+        Param("face_width", "Face Width (mm)", default=8.0, min_value=1.0, step=0.5),
+        Param("bore_d", "Bore Diameter (mm)", default=5.0, min_value=0.0, step=0.5),
+    ),
+    validate=lambda p: gearmath.check("BevelGear", p),
+    build=lambda p: _bored_gear("BevelGear", p["bore_d"], module=p["module"], teeth_number=p["teeth_number"],
+                                cone_angle=p["cone_angle"], face_width=p["face_width"]),
+    file_name=lambda p: "bevel_gear.step",
+))
+
+register(Component(
+    name="CrossedHelicalGear", label="Crossed Helical Gear", category="Gear", source="cq_gears:CrossedHelicalGear",
+    params=(
+        MODULE,
+        Param("teeth_number", "Number of Teeth", kind="int", default=20, min_value=3, step=1),
+        Param("width", "Width (mm)", default=10.0, min_value=1.0, step=0.5),
+        Param("helix_angle", "Helix Angle (°)", default=45.0, min_value=-89.0, max_value=89.0, step=1.0),
+        Param("bore_d", "Bore Diameter (mm)", default=5.0, min_value=0.0, step=0.5),
+    ),
+    validate=lambda p: gearmath.check("CrossedHelicalGear", p),
+    build=lambda p: _bored_gear("CrossedHelicalGear", p["bore_d"], module=p["module"],
+                                teeth_number=p["teeth_number"], width=p["width"], helix_angle=p["helix_angle"]),
+    file_name=lambda p: "crossed_helical_gear.step",
+))
+
+register(Component(
+    name="RackGear", label="Rack Gear", category="Gear", source="cq_gears:RackGear",
+    params=(
+        MODULE,
+        Param("length", "Length (mm)", default=100.0, min_value=10.0, step=1.0),
+        Param("width", "Width (mm)", default=10.0, min_value=1.0, step=0.5),
+        Param("height", "Height (mm)", default=5.0, min_value=1.0, step=0.5,
+              help="The total height of the rack base, excluding teeth."),
+    ),
+    build=lambda p: _workplane(
+        _gear("RackGear")(module=p["module"], length=p["length"], width=p["width"],
+                          height=p["height"]).build()),
+    file_name=lambda p: "rack_gear.step",
+))
+
+register(Component(
+    name="RingGear", label="Ring Gear", category="Gear", source="cq_gears:RingGear",
+    params=(
+        MODULE,
+        Param("teeth_number", "Number of Teeth", kind="int", default=60, min_value=10, step=1),
+        Param("width", "Width (mm)", default=10.0, min_value=1.0, step=0.5),
+        Param("rim_width", "Rim Width (mm)", default=5.0, min_value=1.0, step=0.5,
+              help="The thickness of the solid outer ring."),
+    ),
+    build=lambda p: _workplane(
+        _gear("RingGear")(module=p["module"], teeth_number=p["teeth_number"], width=p["width"],
+                          rim_width=p["rim_width"]).build()),
+    file_name=lambda p: "ring_gear.step",
+))
+
+register(Component(
+    name="Worm", label="Worm Gear", category="Gear", source="cq_gears:Worm",
+    params=(
+        MODULE,
+        Param("lead_angle", "Lead Angle (°)", default=10.0, min_value=1.0, max_value=89.0, step=1.0),
+        Param("n_threads", "Number of Threads", kind="int", default=1, min_value=1, step=1),
+        Param("length", "Length (mm)", default=50.0, min_value=5.0, step=1.0),
+        Param("bore_d", "Bore Diameter (mm)", default=8.0, min_value=0.0, step=0.5),
+    ),
+    build=lambda p: _bored_gear("Worm", p["bore_d"], module=p["module"], lead_angle=p["lead_angle"],
+                                n_threads=p["n_threads"], length=p["length"]),
+    file_name=lambda p: "worm_gear.step",
+))
+
+#----------------------------------FASTNER-------------------------------------------------------------------------------
+
+NUT_CLASSES = {"Hex Nut": "HexNut", "Domed Cap Nut": "DomedCapNut", "Square Nut": "SquareNut",
+               "Heat Set Nut": "HeatSetNut"}
+SCREW_CLASSES = {"Socket Head Cap Screw": "SocketHeadCapScrew", "Counter Sunk Screw": "CounterSunkScrew",
+                 "Pan Head Screw": "PanHeadScrew", "Hex Head Screw": "HexHeadScrew", "Set Screw": "SetScrew"}
+WASHER_CLASSES = {"Plain Washer": "PlainWasher", "Chamfered Washer": "ChamferedWasher"}
+
+SIZE = Param("size", "Size", kind="str")
+FASTENER_TYPE = Param("fastener_type", "Type", kind="str")
+SIMPLE = Param("simple", "Simple (no threads)", kind="bool", default=True)
+
+
+def _fastener(name, p, **kwargs):
+    # threads come from cached segments where the thread simply spans the body
+    cls = _load(f"cq_warehouse.fastener:{name}")
+    if not p["simple"] and threads.supported(name, p["size"]):
+        return threads.threaded(cls, name, p)
+    return cls(size=p["size"], fastener_type=p["fastener_type"], simple=p["simple"], **kwargs)
+
+
+for _label, _name in NUT_CLASSES.items():
+    register(Component(
+        name=_name, label=_label, category="Nut", source=f"cq_warehouse.fastener:{_name}",
+        params=(SIZE, FASTENER_TYPE, SIMPLE),
+        build=lambda p, name=_name: _fastener(name, p),
+        file_name=lambda p, label=_label: f"{label}_{_safe(p['size'])}.step",
+    ))
+
+for _label, _name in SCREW_CLASSES.items():
+    register(Component(
+        name=_name, label=_label, category="Screw", source=f"cq_warehouse.fastener:{_name}",
+        params=(SIZE, FASTENER_TYPE, Param("length", "Length (mm)", default=10.0, min_value=1.0, step=1.0), SIMPLE),
+        build=lambda p, name=_name: _fastener(name, p, length=p["length"]),
+        file_name=lambda p, label=_label: f"{label}_{_safe(p['size'])}_x{p['length']}.step",
+    ))
+
+for _label, _name in WASHER_CLASSES.items():
+    register(Component(
+        name=_name, label=_label, category="Washer", source=f"cq_warehouse.fastener:{_name}",
+        params=(SIZE, FASTENER_TYPE),
+        build=lambda p, source=f"cq_warehouse.fastener:{_name}": _load(source)(
+            size=p["size"], fastener_type=p["fastener_type"]),
+        file_name=lambda p, label=_label: f"{label}_{_safe(p['size'])}.step",
+    ))
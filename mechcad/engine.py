@@ -0,0 +1,342 @@
+"""Background generation engine backed by a pool of warm worker processes.
+
+OCC builds run outside the caller's thread: :meth:`GenerationEngine.submit`
+returns a job id straight away and :meth:`GenerationEngine.status` reports
+the job's state, elapsed time and, once finished, the generated file. Worker
+processes import the CAD stack once when they start and are then reused.
+Identical builds already in flight are coalesced: a request for the same
+part, format and tolerance as a running build waits on that build instead
+of starting another one. New builds go through :mod:`mechcad.admission`
+(cost estimate, per-user caps, hard timeout) and can be cancelled, which
+kills the worker process running them.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, as_completed
+from dataclasses import dataclass
+from typing import Optional
+
+from mechcad import history
+from mechcad.admission import Admission
+from mechcad.cache import cache_key, default_cache
+from mechcad.metrics import default_metrics, profiled, profiling_enabled
+from mechcad.registry import ValidationError
+from mechcad.workers import BuildCancelled, BuildKilled, WorkerPool
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+JOB_TTL = 15 * 60
+
+_import_seconds = None
+
+
+class GenerationError(RuntimeError):
+    """A build failed inside a worker process."""
+
+
+def _warm_worker():
+    global _import_seconds
+    start = time.perf_counter()
+    import cadquery  # noqa: F401
+    import cq_gears  # noqa: F401
+    import cq_warehouse.bearing  # noqa: F401
+    import cq_warehouse.fastener  # noqa: F401
+    from mechcad import export, pipeline  # noqa: F401
+    _import_seconds = time.perf_counter() - start
+
+
+def _ping():
+    return _import_seconds
+
+
+def _run(component, params, fmt="step", tolerance=None):
+    from mechcad import pipeline
+    options = {"fmt": fmt, "tolerance": pipeline.MESH_TOLERANCE if tolerance is None else tolerance}
+    try:
+        if profiling_enabled():
+            result, path = profiled(pipeline.generate, component, component, params, lookup=False, **options)
+            result.profile = path
+            return result
+        return pipeline.generate(component, params, lookup=False, **options)
+    except ValidationError:
+        raise
+    except Exception as e:
+        # OCC exceptions do not always survive pickling back to the parent
+        raise GenerationError(f"{type(e).__name__}: {e}") from None
+
+
+def _run_assembly(parts, name):
+    from mechcad import assembly
+    try:
+        return assembly.generate_assembly(parts, name)
+    except ValidationError:
+        raise
+    except Exception as e:
+        raise GenerationError(f"{type(e).__name__}: {e}") from None
+
+
+def _failure(future):
+    # the exception a finished future ended with, or None
+    if future.cancelled():
+        return BuildCancelled("Cancelled.")
+    return future.exception()
+
+
+@dataclass
+class JobStatus:
+    id: str
+    state: str
+    elapsed: float
+    result: Optional[object] = None
+    error: Optional[str] = None
+    estimate: Optional[float] = None  # predicted build seconds, for new builds
+    position: Optional[int] = None  # place in the user's queue while waiting for a slot
+
+
+class _Job:
+    def __init__(self, component, params, future, coalesced=False, estimate=None, user=None):
+        self.id = uuid.uuid4().hex
+        self.component = component
+        self.params = params
+        self.future = future
+        self.coalesced = coalesced  # waits on another job's build
+        self.estimate = estimate
+        self.user = user  # whose admission slot the build takes
+        self.submitted = time.monotonic()
+        self.finished = None
+        future.add_done_callback(self._on_done)
+
+    def _on_done(self, _future):
+        self.finished = time.monotonic()
+
+    def status(self):
+        future = self.future
+        end = self.finished if self.finished is not None else time.monotonic()
+        elapsed = end - self.submitted
+        if not future.done():
+            return JobStatus(self.id, RUNNING if future.running() else QUEUED, elapsed, estimate=self.estimate)
+        error = _failure(future)
+        if error is not None:
+            return JobStatus(self.id, FAILED, elapsed, error=str(error), estimate=self.estimate)
+        return JobStatus(self.id, DONE, elapsed, result=future.result(), estimate=self.estimate)
+
+
+class GenerationEngine:
+    def __init__(self, max_workers=None, cache=None, record_history=True, metrics=None, admission=None):
+        if max_workers is None:
+            max_workers = int(os.environ.get("MECHCAD_WORKERS", 0)) or os.cpu_count() or 1
+        self.max_workers = max_workers
+        self.cache = default_cache() if cache is None else cache
+        self.record_history = record_history
+        self.metrics = default_metrics() if metrics is None else metrics
+        self.admission = Admission.from_env() if admission is None else admission
+        self._executor = WorkerPool(max_workers, initializer=_warm_worker)
+        self._jobs = {}
+        self._inflight = {}  # (cache key, cache format) -> Future of the build producing it
+        self._lock = threading.Lock()
+        self._created = time.monotonic()
+        self._warmups = []
+        self.first_build_seconds = None
+
+    def warm(self):
+        """Start every worker now instead of on the first jobs."""
+        self._warmups = [self._executor.submit(_ping) for _ in range(self.max_workers)]
+
+    def startup_stats(self):
+        """Cold-start figures: CAD import time in the workers and the first build's latency."""
+        imports = [f.result() for f in self._warmups if f.done() and _failure(f) is None]
+        return {
+            "workers": self.max_workers,
+            "workers_warm": len(imports),
+            "worker_import_seconds": max(imports) if imports else None,
+            "first_build_seconds": self.first_build_seconds,
+        }
+
+    def _record_first_build(self, job):
+        if self.first_build_seconds is None and _failure(job.future) is None:
+            self.first_build_seconds = job.finished - job.submitted
+            logger.info("first build finished in %.2f s (%.2f s after engine start)",
+                        self.first_build_seconds, job.finished - self._created)
+
+    def _observe(self, job):
+        """Report a finished job's stage timings to the metrics."""
+        total = job.finished - job.submitted
+        error = _failure(job.future)
+        if isinstance(error, BuildCancelled):
+            # counted as "cancelled" by cancel(); not a failure
+            return
+        if error is not None:
+            if isinstance(error, BuildKilled):
+                self.metrics.increment("killed")
+            self.metrics.increment("failed")
+            self.metrics.observe("failed", total, job.component)
+            return
+        result = job.future.result()
+        if job.coalesced:
+            # the build's own stages are reported once, by the job that started it
+            self.metrics.record(job.component, job.params, {"coalesced": total, "total": total})
+            return
+        timings = dict(result.timings, total=total)
+        if not result.cached:
+            # time spent waiting for a worker and moving arguments and bytes between processes
+            timings["queue"] = max(total - sum(result.timings.values()), 0.0)
+        self.metrics.record(job.component, job.params, timings, result.profile)
+
+    def _track(self, job):
+        self.metrics.increment("requests")
+        job.future.add_done_callback(lambda _f: self._observe(job))
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        return job.id
+
+    def submit(self, component, params, fmt="step", tolerance=None, user=None, record=True):
+        """Queue a build and return its job id; invalid parameters raise immediately.
+
+        ``fmt`` is one of ``pipeline.FORMATS``; ``tolerance`` (mm) applies to STL and GLB.
+        Builds for the same ``user`` are capped and queued by the admission policy.
+        Accepted requests are logged for warm-up; pass ``record=False`` for another
+        format of a part that was already requested.
+        """
+        from mechcad import pipeline
+        comp, params = pipeline.prepare(component, params)
+        if fmt not in pipeline.FORMATS:
+            raise ValidationError(f"Unknown format {fmt!r}; expected one of {', '.join(pipeline.FORMATS)}")
+        job_id = self._submit(comp, params, fmt, tolerance, user)
+        if record and self.record_history:
+            history.record(comp.name, params)
+        return job_id
+
+    def submit_mesh(self, component, params, tolerance=None, user=None):
+        """Queue tessellation of a part for the 3D viewer; the result is a GLB GeneratedFile."""
+        from mechcad import pipeline
+        comp, params = pipeline.prepare(component, params)
+        return self._submit(comp, params, "glb", tolerance, user)
+
+    def estimate(self, component, params):
+        """Predicted build seconds of a part, or None if its parameters are invalid."""
+        from mechcad import pipeline
+        try:
+            comp, params = pipeline.prepare(component, params)
+        except ValidationError:
+            return None
+        return self.admission.model.estimate(comp, params)
+
+    def _submit(self, comp, params, fmt, tolerance, user=None):
+        from mechcad import pipeline
+        tolerance = pipeline.check_tolerance(tolerance) if fmt in pipeline.MESH_FORMATS else pipeline.MESH_TOLERANCE
+        key = cache_key(comp.name, params)
+        start = time.perf_counter()
+        data = self.cache.get(key, fmt=pipeline.cache_format(fmt, tolerance))
+        coalesced = started = False
+        estimate = None
+        if data is not None:
+            future = Future()
+            future.set_result(pipeline.GeneratedFile(data, pipeline.file_name(comp, params, fmt), key, cached=True,
+                                                     timings={"cache": time.perf_counter() - start}))
+        else:
+            flight = (key, pipeline.cache_format(fmt, tolerance))
+            with self._lock:
+                future = self._inflight.get(flight)
+                coalesced = future is not None
+                if not coalesced:
+                    # only new builds cost anything, so only they are estimated and admitted
+                    estimate = self.admission.check(comp, params, user)
+                    future = Future()
+                    self._inflight[flight] = future
+                    started = True
+            if coalesced:
+                self.metrics.increment("coalesced")
+            else:
+                future.add_done_callback(lambda f: self._land(flight, f))
+        job = _Job(comp.name, params, future, coalesced, estimate, user if started else None)
+        if self.first_build_seconds is None and started:
+            future.add_done_callback(lambda _f: self._record_first_build(job))
+        job_id = self._track(job)
+        if started:
+            self.admission.request(user, future,
+                                   lambda: self._dispatch(future, _run, comp.name, params, fmt, tolerance))
+        return job_id
+
+    def _dispatch(self, future, fn, *args):
+        # called by the admission policy once the user has a free slot
+        if not future.done():
+            self._executor.submit(fn, *args, timeout=self.admission.timeout, future=future)
+
+    def _land(self, flight, future):
+        with self._lock:
+            if self._inflight.get(flight) is future:
+                del self._inflight[flight]
+
+    def submit_assembly(self, parts, name="assembly", user=None):
+        """Queue a single-STEP assembly of ``parts`` (a list of AssemblyPart).
+
+        It is admitted like a part build, estimated as the sum of its parts' estimates.
+        """
+        from mechcad import pipeline
+        estimate = 0.0
+        for part in parts:
+            comp, params = pipeline.prepare(part.component, part.params)
+            estimate += self.admission.model.estimate(comp, params)
+        estimate = self.admission.admit(estimate, f"The assembly of {len(parts)} parts",
+                                        "Split it into smaller batches.", user)
+        future = Future()
+        job_id = self._track(_Job("Assembly", {"name": name}, future, estimate=estimate, user=user))
+        self.admission.request(user, future, lambda: self._dispatch(future, _run_assembly, parts, name))
+        return job_id
+
+    def _prune(self):
+        now = time.monotonic()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished is not None and now - job.finished > JOB_TTL]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _job(self, job_id):
+        with self._lock:
+            try:
+                return self._jobs[job_id]
+            except KeyError:
+                raise KeyError(f"Unknown job {job_id}") from None
+
+    def status(self, job_id):
+        job = self._job(job_id)
+        status = job.status()
+        if status.state == QUEUED and job.user is not None:
+            status.position = self.admission.position(job.user, job.future)
+        return status
+
+    def result(self, job_id, timeout=None):
+        """Block until the job finishes and return its GeneratedFile."""
+        return self._job(job_id).future.result(timeout)
+
+    def as_completed(self, job_ids, timeout=None):
+        """Yield job ids as their jobs finish, in completion order."""
+        futures = {self._job(job_id).future: job_id for job_id in job_ids}
+        for future in as_completed(futures, timeout):
+            yield futures[future]
+
+    def cancel(self, job_id):
+        """Cancel a job; its build is killed unless other requests are waiting on it too."""
+        job = self._job(job_id)
+        with self._lock:
+            shared = any(other.future is job.future for other in self._jobs.values() if other is not job)
+            if shared:
+                del self._jobs[job_id]
+        if not shared and self._executor.kill(job.future):
+            self.metrics.increment("cancelled")
+
+    def forget(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
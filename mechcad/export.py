@@ -0,0 +1,136 @@
+"""Serialize shapes straight to bytes.
+
+STEP data is written into an in-memory buffer, so concurrent requests never
+share a file name and a generation costs no disk round trip. STL and GLB
+meshes are tessellated here and encoded by :mod:`mechcad.mesh`.
+"""
+import io
+import os
+import tempfile
+
+import cadquery as cq
+import numpy as np
+from OCP.IFSelect import IFSelect_RetDone
+from OCP.Interface import Interface_Static
+from OCP.STEPCAFControl import STEPCAFControl_Writer
+from OCP.STEPControl import STEPControl_AsIs, STEPControl_Writer
+from OCP.TCollection import TCollection_ExtendedString
+from OCP.TDataStd import TDataStd_Name
+from OCP.TDocStd import TDocStd_Document
+from OCP.TopLoc import TopLoc_Location
+from OCP.XCAFApp import XCAFApp_Application
+from OCP.XCAFDoc import XCAFDoc_DocumentTool
+
+
+def to_shape(obj):
+    """Return a single cadquery Shape for a Workplane or Shape."""
+    if isinstance(obj, cq.Workplane):
+        shapes = [val for val in obj.vals() if isinstance(val, cq.Shape)]
+        return shapes[0] if len(shapes) == 1 else cq.Compound.makeCompound(shapes)
+    return obj
+
+
+def _write(writer):
+    # OCCT >= 7.7 can write to any Python file object; older builds only take a path,
+    # in which case the file goes to a private directory nobody else can collide with.
+    if hasattr(writer, "WriteStream"):
+        stream = io.BytesIO()
+        if writer.WriteStream(stream) == IFSelect_RetDone:
+            return stream.getvalue()
+    with tempfile.TemporaryDirectory(prefix="mechcad-") as tmp:
+        path = os.path.join(tmp, "part.step")
+        if writer.Write(path) != IFSelect_RetDone:
+            raise RuntimeError("STEP export failed")
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def to_step_bytes(obj):
+    shape = to_shape(obj)
+    writer = STEPControl_Writer()
+    # same settings as cadquery's Shape.exportStep defaults
+    Interface_Static.SetIVal_s("write.surfacecurve.mode", 1)
+    Interface_Static.SetIVal_s("write.precision.mode", 0)
+    if writer.Transfer(shape.wrapped, STEPControl_AsIs) != IFSelect_RetDone:
+        raise RuntimeError("STEP export failed")
+    return _write(writer)
+
+
+def to_brep_bytes(obj):
+    stream = io.BytesIO()
+    to_shape(obj).exportBrep(stream)
+    return stream.getvalue()
+
+
+def from_brep_bytes(data):
+    return cq.Shape.importBrep(io.BytesIO(data))
+
+
+def tessellate(obj, tolerance=0.1, angular_tolerance=0.2):
+    """Vertices (N, 3) and triangles (M, 3) of the shape, ``tolerance`` in mm."""
+    vertices, triangles = to_shape(obj).tessellate(tolerance, angular_tolerance)
+    return (np.array([v.toTuple() for v in vertices], dtype=np.float32).reshape(-1, 3),
+            np.array(triangles, dtype=np.uint32).reshape(-1, 3))
+
+
+def to_glb_bytes(obj, tolerance=0.1):
+    from mechcad.mesh import encode_glb
+    return encode_glb(*tessellate(obj, tolerance))
+
+
+def to_stl_bytes(obj, tolerance=0.1):
+    from mechcad.mesh import encode_stl
+    return encode_stl(*tessellate(obj, tolerance))
+
+
+def _set_name(label, name):
+    TDataStd_Name.Set_s(label, TCollection_ExtendedString(name))
+
+
+def assembly_to_step_bytes(assy, part_names=None):
+    """Export a cq.Assembly as one STEP file with shared geometry.
+
+    Nodes that wrap the same shape object (for example copies made by
+    ``Assembly.add(sub_assembly, loc=...)``) reference a single part
+    definition, so the file grows with the number of unique parts rather
+    than the number of placed instances.
+    """
+    part_names = part_names or {}
+    app = XCAFApp_Application.GetApplication_s()
+    doc = TDocStd_Document(TCollection_ExtendedString("XmlOcaf"))
+    app.InitDocument(doc)
+    tool = XCAFDoc_DocumentTool.ShapeTool_s(doc.Main())
+    tool.SetAutoNaming_s(False)
+    parts = {}
+
+    def part_label(node):
+        label = parts.get(id(node.obj))
+        if label is None:
+            label = tool.AddShape(to_shape(node.obj).wrapped, False)
+            _set_name(label, part_names.get(id(node.obj), node.name))
+            parts[id(node.obj)] = label
+        return label
+
+    def add(node, parent):
+        if parent is not None and node.obj is not None and not node.children:
+            _set_name(tool.AddComponent(parent, part_label(node), node.loc.wrapped), node.name)
+            return
+        label = tool.NewShape()
+        _set_name(label, node.name)
+        if node.obj is not None:
+            tool.AddComponent(label, part_label(node), TopLoc_Location())
+        for child in node.children:
+            add(child, label)
+        if parent is not None:
+            _set_name(tool.AddComponent(parent, label, node.loc.wrapped), node.name)
+
+    add(assy, None)
+    tool.UpdateAssemblies()
+
+    writer = STEPCAFControl_Writer()
+    writer.SetNameMode(True)
+    Interface_Static.SetIVal_s("write.surfacecurve.mode", 1)
+    Interface_Static.SetIVal_s("write.precision.mode", 0)
+    if not writer.Transfer(doc, STEPControl_AsIs):
+        raise RuntimeError("STEP export failed")
+    return _write(writer.ChangeWriter())
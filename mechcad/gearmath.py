@@ -0,0 +1,160 @@
+"""Gear geometry and validity rules for one gear or many at once.
+
+Every function takes a parameter dict whose values are scalars or NumPy
+arrays of any broadcastable shape, so the same code answers a single UI
+input change, checks every row of a sweep in one pass, and backs the
+validators of the registered gears. Diameters are in mm; standard tooth
+proportions (20° pressure angle, addendum 1 m, dedendum 1.25 m) are assumed.
+"""
+import numpy as np
+
+from mechcad.registry import ValidationError
+
+PRESSURE_ANGLE = 20.0  # degrees, the cq_gears default
+ADDENDUM = 1.0  # x module
+DEDENDUM = 1.25  # x module
+
+DIMENSIONS = ("pitch_d", "tip_d", "root_d", "base_d", "max_bore_d", "contact_ratio", "center_distance")
+
+
+def _arrays(params, *names):
+    return np.broadcast_arrays(*(np.asarray(params[name], dtype=float) for name in names))
+
+
+def _path(tip_d, base_d):
+    # length of the line of action inside one gear's tip circle
+    return np.sqrt(np.maximum((tip_d / 2) ** 2 - (base_d / 2) ** 2, 0.0))
+
+
+def derive(component, params, mate_teeth=None):
+    """Derived dimensions of a gear as arrays (NaN where a dimension does not apply).
+
+    ``contact_ratio`` and ``center_distance`` are for meshing with a standard
+    mate of ``mate_teeth`` teeth: an identical gear for external gears by
+    default, a crossed helical wheel for worms and a pinion for ring gears
+    and racks (which have no default mate).
+    """
+    m = np.asarray(params["module"], dtype=float)
+    alpha = np.radians(PRESSURE_ANGLE)
+    nan = np.full(m.shape, np.nan)
+
+    if component in ("SpurGear", "CrossedHelicalGear", "RingGear"):
+        m, z = _arrays(params, "module", "teeth_number")
+        beta = np.radians(np.asarray(params.get("helix_angle", 0.0), dtype=float))
+        mt = m / np.cos(beta)
+        alpha_t = np.arctan(np.tan(alpha) / np.cos(beta))
+        pitch_d = mt * z
+        base_d = pitch_d * np.cos(alpha_t)
+        internal = component == "RingGear"
+        if internal:
+            tip_d = pitch_d - 2 * ADDENDUM * m
+            root_d = pitch_d + 2 * DEDENDUM * m
+            max_bore_d = np.full(pitch_d.shape, np.nan)
+        else:
+            tip_d = pitch_d + 2 * ADDENDUM * m
+            root_d = pitch_d - 2 * DEDENDUM * m
+            max_bore_d = mt * (z - 2.5)
+        if mate_teeth is None and internal:
+            mate = np.full(pitch_d.shape, np.nan)
+        else:
+            mate = z if mate_teeth is None else np.asarray(mate_teeth, dtype=float)
+        mate_d = mt * mate
+        mate_tip_d = mate_d + 2 * ADDENDUM * m
+        mate_base_d = mate_d * np.cos(alpha_t)
+        base_pitch = np.pi * mt * np.cos(alpha_t)
+        if internal:
+            center_distance = (pitch_d - mate_d) / 2
+            contact_ratio = (_path(mate_tip_d, mate_base_d) - _path(tip_d, base_d)
+                             + center_distance * np.sin(alpha_t)) / base_pitch
+        else:
+            center_distance = (pitch_d + mate_d) / 2
+            contact_ratio = (_path(tip_d, base_d) + _path(mate_tip_d, mate_base_d)
+                             - center_distance * np.sin(alpha_t)) / base_pitch
+
+    elif component == "BevelGear":
+        m, z, cone, face, _ = _arrays(params, "module", "teeth_number", "cone_angle", "face_width", "bore_d")
+        gamma = np.radians(cone)
+        pitch_d = m * z
+        cone_distance = pitch_d / 2 / np.sin(gamma)
+        tip_d = pitch_d + 2 * ADDENDUM * m * np.cos(gamma)
+        root_d = pitch_d - 2 * DEDENDUM * m * np.cos(gamma)
+        base_d = pitch_d * np.cos(alpha)
+        # the bore has to clear the root at the small end of the teeth
+        max_bore_d = root_d * (cone_distance - face) / cone_distance
+        # Tredgold's approximation: a spur pair with the back-cone (virtual) tooth counts
+        virtual_d = pitch_d / np.cos(gamma)
+        if mate_teeth is None:
+            mate, mate_gamma = z, gamma
+        else:
+            # shafts at 90°: the mate's cone angle follows from the tooth ratio
+            mate = np.asarray(mate_teeth, dtype=float)
+            mate_gamma = np.arctan2(mate, z)
+        mate_virtual_d = m * mate / np.cos(mate_gamma)
+        center_distance = (virtual_d + mate_virtual_d) / 2
+        contact_ratio = (_path(virtual_d + 2 * ADDENDUM * m, virtual_d * np.cos(alpha))
+                         + _path(mate_virtual_d + 2 * ADDENDUM * m, mate_virtual_d * np.cos(alpha))
+                         - center_distance * np.sin(alpha)) / (np.pi * m * np.cos(alpha))
+        # bevel axes intersect: the "center distance" reported is the cone distance
+        center_distance = cone_distance
+
+    elif component == "Worm":
+        # normal module, as for a crossed helical pair with helix angles 90° - lead and lead
+        m, lead, n = _arrays(params, "module", "lead_angle", "n_threads")
+        pitch_d = m * n / np.sin(np.radians(lead))
+        tip_d = pitch_d + 2 * ADDENDUM * m
+        root_d = pitch_d - 2 * DEDENDUM * m
+        base_d = np.full(pitch_d.shape, np.nan)
+        max_bore_d = root_d
+        # the wheel is a crossed helical gear with helix angle = lead angle
+        wheel_d = m * (np.nan if mate_teeth is None else np.asarray(mate_teeth, dtype=float)) / np.cos(np.radians(lead))
+        center_distance = (pitch_d + wheel_d) / 2
+        contact_ratio = np.full(pitch_d.shape, np.nan)
+
+    elif component == "RackGear":
+        m = np.asarray(params["module"], dtype=float)
+        pitch_d = tip_d = root_d = base_d = max_bore_d = nan
+        mate = np.nan if mate_teeth is None else np.asarray(mate_teeth, dtype=float)
+        # rack and pinion: pinion axis above the pitch line
+        center_distance = m * mate / 2
+        pinion_tip_d = m * mate + 2 * ADDENDUM * m
+        contact_ratio = (_path(pinion_tip_d, m * mate * np.cos(alpha)) - center_distance * np.sin(alpha)
+                         + ADDENDUM * m / np.sin(alpha)) / (np.pi * m * np.cos(alpha))
+    else:
+        raise ValidationError(f"No gear geometry for {component}.")
+
+    return dict(zip(DIMENSIONS, (np.asarray(v, dtype=float) for v in (
+        pitch_d, tip_d, root_d, base_d, max_bore_d, contact_ratio, center_distance))))
+
+
+def _rules(component, params, dims):
+    # (invalid mask, message template, limit); the first failing rule per gear is reported
+    rules = []
+    if component == "BevelGear":
+        cone_distance = dims["center_distance"]
+        rules.append((np.asarray(params["face_width"], dtype=float) >= cone_distance,
+                      "Face Width is too large. Must be less than {:.2f} mm.", cone_distance))
+    if component in ("SpurGear", "CrossedHelicalGear", "BevelGear"):
+        max_bore_d = dims["max_bore_d"]
+        rules.append((np.asarray(params["bore_d"], dtype=float) >= max_bore_d,
+                      "Bore Diameter is too large. Maximum is {:.2f} mm.", max_bore_d))
+    return rules
+
+
+def problems(component, params):
+    """Array of error messages, "" where the gear is valid."""
+    dims = derive(component, params)
+    rules = _rules(component, params, dims)
+    shape = np.broadcast_shapes(*(np.shape(v) for v in params.values() if not isinstance(v, str)))
+    reasons = np.full(shape, "", dtype=object)
+    for invalid, template, limit in rules:
+        selected = (reasons == "") & np.broadcast_to(invalid, shape)
+        if selected.any():
+            reasons[selected] = [template.format(v) for v in np.broadcast_to(limit, shape)[selected]]
+    return reasons
+
+
+def check(component, params):
+    """Raise ValidationError if a single gear is invalid."""
+    reason = problems(component, params).item()
+    if reason:
+        raise ValidationError(reason)
@@ -0,0 +1,220 @@
+"""Meshing gear sets: spur and bevel pairs, worm and wheel, planetary trains.
+
+A gear set is one small parameter schema (module, tooth counts, widths,
+bores) from which every member gear is derived. :func:`layout` works out
+the member parameters and the center distances with
+:func:`mechcad.gearmath.derive`, rotates each gear so its teeth fall into
+the spaces of its mate, and returns the members as BOM rows with explicit
+positions. Members are ordinary registered gears: :func:`generate` builds
+them concurrently through the batch machinery, so identical members (the
+planets) are built once and placed several times, each member is cached
+on its own (changing one tooth count rebuilds one gear), and the finished
+members are combined into a single STEP assembly.
+
+Teeth are phased assuming every gear, internal or external, has a tooth
+centred on its +X axis. Bevel and worm sets are positioned but not phased.
+"""
+import math
+from concurrent.futures import TimeoutError
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Tuple
+
+from mechcad import batch, gearmath
+from mechcad.engine import GenerationError
+from mechcad.registry import Component, Param, ValidationError, get
+
+MODULE = Param("module", "Module", default=1.0, min_value=0.1, step=0.1)
+
+
+@dataclass
+class Layout:
+    rows: List[batch.BomRow]
+    info: Dict[str, float] = field(default_factory=dict)  # label -> value, for display
+
+
+@dataclass(frozen=True)
+class GearSet:
+    name: str
+    label: str
+    params: Tuple[Param, ...]
+    layout: Callable[[Dict[str, Any]], Layout]
+
+    # same schema handling as a single component
+    coerce = Component.coerce
+
+
+def _member(component, params, name, positions, role):
+    comp = get(component)
+    try:
+        params = comp.coerce(params)
+        comp.check(params)
+    except ValidationError as e:
+        raise ValidationError(f"{role}: {e}") from None
+    return [batch.BomRow(component, params, name=name, position=position) for position in positions]
+
+
+def _mesh_phase(angle, sun_teeth, planet_teeth):
+    # rotation (degrees) of an external gear whose centre lies at ``angle`` from the
+    # centre of an unrotated external gear, so that the two mesh
+    past_tooth = (angle * sun_teeth / 360.0) % 1.0
+    return (angle + 180.0 + (past_tooth - 0.5) * 360.0 / planet_teeth) % 360.0
+
+
+def _spur_pair(p):
+    m, z1, z2 = p["module"], p["pinion_teeth"], p["gear_teeth"]
+    pinion = {"module": m, "teeth_number": z1, "width": p["width"], "bore_d": p["pinion_bore_d"]}
+    gear = {"module": m, "teeth_number": z2, "width": p["width"], "bore_d": p["gear_bore_d"]}
+    dims = gearmath.derive("SpurGear", pinion, mate_teeth=z2)
+    a = float(dims["center_distance"])
+    rows = (_member("SpurGear", pinion, f"pinion_z{z1}.step", [(0.0, 0.0, 0.0, 0.0)], "Pinion")
+            + _member("SpurGear", gear, f"gear_z{z2}.step", [(a, 0.0, 0.0, _mesh_phase(0.0, z1, z2))], "Gear"))
+    return Layout(rows, {"Center distance (mm)": a, "Ratio": z2 / z1,
+                         "Contact ratio": float(dims["contact_ratio"])})
+
+
+def _bevel_pair(p):
+    m, z1, z2 = p["module"], p["pinion_teeth"], p["gear_teeth"]
+    # shafts at 90°: the pitch cones share their apex
+    gamma1 = math.degrees(math.atan2(z1, z2))
+    gamma2 = 90.0 - gamma1
+    pinion = {"module": m, "teeth_number": z1, "cone_angle": gamma1, "face_width": p["face_width"],
+              "bore_d": p["pinion_bore_d"]}
+    gear = {"module": m, "teeth_number": z2, "cone_angle": gamma2, "face_width": p["face_width"],
+            "bore_d": p["gear_bore_d"]}
+    dims = gearmath.derive("BevelGear", pinion, mate_teeth=z2)
+    # apex height above each gear's pitch circle, which sits at z = 0
+    apex1 = m * z1 / 2 / math.tan(math.radians(gamma1))
+    apex2 = m * z2 / 2 / math.tan(math.radians(gamma2))
+    rows = (_member("BevelGear", pinion, f"bevel_pinion_z{z1}.step", [(-apex1, 0.0, apex2, 0.0, 0.0, 90.0)], "Pinion")
+            + _member("BevelGear", gear, f"bevel_gear_z{z2}.step", [(0.0, 0.0, 0.0, 0.0)], "Gear"))
+    return Layout(rows, {"Cone distance (mm)": float(dims["center_distance"]), "Ratio": z2 / z1,
+                         "Pinion cone angle (°)": gamma1, "Gear cone angle (°)": gamma2,
+                         "Contact ratio": float(dims["contact_ratio"])})
+
+
+def _worm_pair(p):
+    m, lead, z = p["module"], p["lead_angle"], p["wheel_teeth"]
+    worm = {"module": m, "lead_angle": lead, "n_threads": p["n_threads"], "length": p["worm_length"],
+            "bore_d": p["worm_bore_d"]}
+    # the wheel is a crossed helical gear at 90° to the worm, its helix angle equal to the lead angle
+    wheel = {"module": m, "teeth_number": z, "width": p["wheel_width"], "helix_angle": lead,
+             "bore_d": p["wheel_bore_d"]}
+    a = float(gearmath.derive("Worm", worm, mate_teeth=z)["center_distance"])
+    # worm along Z, wheel axis along Y, centred on the middle of the worm
+    rows = (_member("Worm", worm, f"worm_{p['n_threads']}start.step", [(0.0, 0.0, 0.0, 0.0)], "Worm")
+            + _member("CrossedHelicalGear", wheel, f"worm_wheel_z{z}.step",
+                      [(a, p["wheel_width"] / 2, p["worm_length"] / 2, 0.0, 90.0, 0.0)], "Wheel"))
+    return Layout(rows, {"Center distance (mm)": a, "Ratio": z / p["n_threads"]})
+
+
+def _planetary(p):
+    m, zs, zp, n = p["module"], p["sun_teeth"], p["planet_teeth"], p["n_planets"]
+    zr = zs + 2 * zp
+    if (zs + zr) % n:
+        raise ValidationError(f"Sun + ring teeth ({zs + zr}) must be divisible by the number of planets ({n}) "
+                              "for equally spaced planets.")
+    sun = {"module": m, "teeth_number": zs, "width": p["width"], "bore_d": p["sun_bore_d"]}
+    planet = {"module": m, "teeth_number": zp, "width": p["width"], "bore_d": p["planet_bore_d"]}
+    ring = {"module": m, "teeth_number": zr, "width": p["width"], "rim_width": p["rim_width"]}
+    dims = gearmath.derive("SpurGear", sun, mate_teeth=zp)
+    a = float(dims["center_distance"])
+    planet_tip_d = float(gearmath.derive("SpurGear", planet)["tip_d"])
+    if n > 1 and 2 * a * math.sin(math.pi / n) <= planet_tip_d:
+        raise ValidationError(f"{n} planets of {zp} teeth overlap; use fewer planets or a larger sun.")
+
+    angles = [360.0 * k / n for k in range(n)]
+    planets = [(a * math.cos(math.radians(t)), a * math.sin(math.radians(t)), 0.0, _mesh_phase(t, zs, zp))
+               for t in angles]
+    # the ring meshes with the outward side of planet 0, turning the same way
+    past_tooth = ((0.0 - planets[0][3]) * zp / 360.0) % 1.0
+    ring_phase = -(past_tooth + 0.5) * 360.0 / zr
+    rows = (_member("SpurGear", sun, f"sun_z{zs}.step", [(0.0, 0.0, 0.0, 0.0)], "Sun")
+            + _member("SpurGear", planet, f"planet_z{zp}.step", planets, "Planet")
+            + _member("RingGear", ring, f"ring_z{zr}.step", [(0.0, 0.0, 0.0, ring_phase % 360.0)], "Ring"))
+    return Layout(rows, {"Ring teeth": zr, "Planet center distance (mm)": a,
+                         "Ratio (ring fixed, sun to carrier)": 1 + zr / zs,
+                         "Contact ratio (sun/planet)": float(dims["contact_ratio"])})
+
+
+def _bore(name, label, default):
+    return Param(name, label, default=default, min_value=0.0, step=0.5)
+
+
+GEAR_SETS: Dict[str, GearSet] = {g.name: g for g in (
+    GearSet("spur_pair", "Spur Gear Pair", (
+        MODULE,
+        Param("pinion_teeth", "Pinion Teeth", kind="int", default=12, min_value=6, step=1),
+        Param("gear_teeth", "Gear Teeth", kind="int", default=36, min_value=6, step=1),
+        Param("width", "Thickness (mm)", default=5.0, min_value=0.1, step=0.5),
+        _bore("pinion_bore_d", "Pinion Bore (mm)", 3.0),
+        _bore("gear_bore_d", "Gear Bore (mm)", 8.0),
+    ), _spur_pair),
+    GearSet("bevel_pair", "Bevel Gear Pair", (
+        MODULE,
+        Param("pinion_teeth", "Pinion Teeth", kind="int", default=15, min_value=5, step=1),
+        Param("gear_teeth", "Gear Teeth", kind="int", default=30, min_value=5, step=1),
+        Param("face_width", "Face Width (mm)", default=5.0, min_value=1.0, step=0.5),
+        _bore("pinion_bore_d", "Pinion Bore (mm)", 3.0),
+        _bore("gear_bore_d", "Gear Bore (mm)", 8.0),
+    ), _bevel_pair),
+    GearSet("worm_pair", "Worm and Wheel", (
+        MODULE,
+        Param("lead_angle", "Lead Angle (°)", default=10.0, min_value=1.0, max_value=45.0, step=1.0),
+        Param("n_threads", "Number of Threads", kind="int", default=1, min_value=1, step=1),
+        Param("worm_length", "Worm Length (mm)", default=40.0, min_value=5.0, step=1.0),
+        _bore("worm_bore_d", "Worm Bore (mm)", 3.0),
+        Param("wheel_teeth", "Wheel Teeth", kind="int", default=30, min_value=10, step=1),
+        Param("wheel_width", "Wheel Width (mm)", default=8.0, min_value=1.0, step=0.5),
+        _bore("wheel_bore_d", "Wheel Bore (mm)", 8.0),
+    ), _worm_pair),
+    GearSet("planetary", "Planetary Gear Train", (
+        MODULE,
+        Param("sun_teeth", "Sun Teeth", kind="int", default=12, min_value=6, step=1),
+        Param("planet_teeth", "Planet Teeth", kind="int", default=18, min_value=6, step=1),
+        Param("n_planets", "Number of Planets", kind="int", default=3, min_value=1, max_value=12, step=1),
+        Param("width", "Width (mm)", default=10.0, min_value=1.0, step=0.5),
+        Param("rim_width", "Ring Rim Width (mm)", default=5.0, min_value=1.0, step=0.5),
+        _bore("sun_bore_d", "Sun Bore (mm)", 4.0),
+        _bore("planet_bore_d", "Planet Bore (mm)", 4.0),
+    ), _planetary),
+)}
+
+
+def find(name):
+    """Look a gear set up by name or label, ignoring case, spaces and underscores."""
+    def squash(text):
+        return "".join(str(text).replace("_", " ").split()).lower()
+    wanted = squash(name)
+    for gear_set in GEAR_SETS.values():
+        if wanted in (squash(gear_set.name), squash(gear_set.label)):
+            return gear_set
+    raise ValidationError(f"Unknown gear set '{name}'. Choose one of: {', '.join(GEAR_SETS)}.")
+
+
+def layout(name, raw):
+    """Return the gear set, its typed parameters and the Layout of its members."""
+    gear_set = find(name)
+    params = gear_set.coerce(raw)
+    return gear_set, params, gear_set.layout(params)
+
+
+def generate(engine, name, raw, timeout=None, user=None):
+    """Build every member on ``engine`` in parallel and return the assembly's GeneratedFile."""
+    gear_set, params, plan = layout(name, raw)
+    results = list(batch.run_batch(plan.rows, engine, timeout, user))
+    for result in results:
+        if result.error == batch.TIMED_OUT:
+            raise TimeoutError(f"{result.name}: {result.error}")
+        if result.refusal is not None:
+            # keeps its type, so callers can tell a full queue from a too expensive member
+            raise result.refusal
+        if not result.ok:
+            raise GenerationError(f"{result.name}: {result.error}")
+    job_id = engine.submit_assembly(batch.assembly_parts(results), gear_set.name, user)
+    try:
+        return engine.result(job_id, timeout)
+    except TimeoutError:
+        engine.cancel(job_id)
+        raise
+    finally:
+        engine.forget(job_id)
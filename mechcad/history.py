@@ -0,0 +1,44 @@
+"""Append-only log of generation requests, used to pick parts to pre-build."""
+import json
+import os
+import time
+from collections import Counter
+
+from mechcad.cache import default_cache, normalize
+
+
+def log_path():
+    return os.environ.get("MECHCAD_REQUEST_LOG") or os.path.join(default_cache().directory, "requests.jsonl")
+
+
+def record(component, params):
+    line = json.dumps({"t": round(time.time(), 3), "component": component, "params": params},
+                      sort_keys=True, default=str) + "\n"
+    try:
+        # one O_APPEND write per request keeps lines intact across processes
+        fd = os.open(log_path(), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+def top_requests(n, path=None):
+    """The ``n`` most requested (component, params) pairs, most popular first."""
+    counts = Counter()
+    specs = {}
+    try:
+        with open(path or log_path(), encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                spec_key = json.dumps([entry["component"], normalize(entry["params"])], sort_keys=True)
+                counts[spec_key] += 1
+                specs[spec_key] = (entry["component"], entry["params"])
+    except FileNotFoundError:
+        return []
+    return [specs[spec_key] + (count,) for spec_key, count in counts.most_common(n)]
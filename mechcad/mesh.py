@@ -0,0 +1,97 @@
+"""Binary glTF (GLB) and binary STL encoding of triangle meshes.
+
+Only NumPy and the standard library are used, so meshes can be encoded and
+decoded anywhere; tessellating a shape is left to :mod:`mechcad.export`.
+"""
+import json
+import struct
+
+import numpy as np
+
+GLB_MAGIC = 0x46546C67  # "glTF"
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+FLOAT = 5126
+UNSIGNED_INT = 5125
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+# CAD models are Z-up millimetres, glTF is Y-up metres
+Z_UP_TO_Y_UP = [-0.7071068, 0.0, 0.0, 0.7071068]
+MM = 0.001
+
+COLOR = (0.44, 0.66, 0.86, 1.0)
+
+STL_TRIANGLE = np.dtype([("normal", "<f4", 3), ("vertices", "<f4", (3, 3)), ("attributes", "<u2")])
+
+
+def _pad(data, fill):
+    return data + fill * (-len(data) % 4)
+
+
+def encode_glb(vertices, triangles, color=COLOR):
+    """GLB bytes of one mesh; ``vertices`` is (N, 3) in mm and ``triangles`` (M, 3) vertex indices."""
+    vertices = np.ascontiguousarray(vertices, dtype="<f4").reshape(-1, 3)
+    triangles = np.ascontiguousarray(triangles, dtype="<u4").reshape(-1, 3)
+    positions = vertices.tobytes()
+    indices = triangles.tobytes()
+    binary = _pad(positions, b"\0") + indices
+    if len(vertices):
+        lo, hi = vertices.min(axis=0).tolist(), vertices.max(axis=0).tolist()
+    else:
+        lo = hi = [0.0, 0.0, 0.0]
+    gltf = {
+        "asset": {"version": "2.0", "generator": "MechCAD Stop"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0, "rotation": Z_UP_TO_Y_UP, "scale": [MM, MM, MM]}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}, "indices": 1, "material": 0}]}],
+        "materials": [{"pbrMetallicRoughness": {"baseColorFactor": list(color), "metallicFactor": 0.4,
+                                                "roughnessFactor": 0.5}, "doubleSided": True}],
+        "buffers": [{"byteLength": len(_pad(binary, b"\0"))}],
+        "bufferViews": [
+            {"buffer": 0, "byteOffset": 0, "byteLength": len(positions), "target": ARRAY_BUFFER},
+            {"buffer": 0, "byteOffset": len(_pad(positions, b"\0")), "byteLength": len(indices),
+             "target": ELEMENT_ARRAY_BUFFER},
+        ],
+        "accessors": [
+            {"bufferView": 0, "componentType": FLOAT, "count": len(vertices), "type": "VEC3", "min": lo, "max": hi},
+            {"bufferView": 1, "componentType": UNSIGNED_INT, "count": triangles.size, "type": "SCALAR"},
+        ],
+    }
+    json_chunk = _pad(json.dumps(gltf, separators=(",", ":")).encode("utf-8"), b" ")
+    bin_chunk = _pad(binary, b"\0")
+    total = 12 + 8 + len(json_chunk) + 8 + len(bin_chunk)
+    return b"".join([
+        struct.pack("<III", GLB_MAGIC, 2, total),
+        struct.pack("<II", len(json_chunk), CHUNK_JSON), json_chunk,
+        struct.pack("<II", len(bin_chunk), CHUNK_BIN), bin_chunk,
+    ])
+
+
+def decode_glb(data):
+    """Vertices (mm) and triangles of a GLB written by :func:`encode_glb`."""
+    magic, _version, _total = struct.unpack_from("<III", data, 0)
+    if magic != GLB_MAGIC:
+        raise ValueError("not a GLB file")
+    json_length, _ = struct.unpack_from("<II", data, 12)
+    gltf = json.loads(data[20:20 + json_length])
+    binary = memoryview(data)[28 + json_length:]
+    views = gltf["bufferViews"]
+    positions, indices = (gltf["accessors"][i] for i in (0, 1))
+    vertices = np.frombuffer(binary, "<f4", positions["count"] * 3, views[0]["byteOffset"]).reshape(-1, 3)
+    triangles = np.frombuffer(binary, "<u4", indices["count"], views[1]["byteOffset"]).reshape(-1, 3)
+    return vertices, triangles
+
+
+def encode_stl(vertices, triangles):
+    """Binary STL bytes of a mesh (mm)."""
+    corners = np.asarray(vertices, dtype=np.float32)[np.asarray(triangles, dtype=np.int64).reshape(-1, 3)]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    records = np.zeros(len(corners), dtype=STL_TRIANGLE)
+    records["normal"] = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+    records["vertices"] = corners
+    header = b"MechCAD Stop binary STL".ljust(80, b" ")
+    return header + struct.pack("<I", len(records)) + records.tobytes()
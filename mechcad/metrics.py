@@ -0,0 +1,102 @@
+"""Rolling latency metrics for generation requests.
+
+Every finished job reports how long it spent in each stage (``queue``,
+``build``, ``export``, ``cache``, ...) under its component name. The last
+:data:`WINDOW` samples per stage and component are kept in memory, and
+:meth:`Metrics.summary` turns them into percentiles for the HTTP
+``/metrics`` endpoint and the sidebar's Diagnostics panel. Requests slower
+than ``MECHCAD_SLOW_SECONDS`` are also kept, with their parameters and, if
+``MECHCAD_PROFILE`` is set, the path of a cProfile dump of the build.
+"""
+import cProfile
+import functools
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+from mechcad.cache import default_cache
+
+WINDOW = 1000
+SLOW_KEEP = 50
+ALL = "*"
+
+
+def slow_seconds():
+    return float(os.environ.get("MECHCAD_SLOW_SECONDS", 10))
+
+
+def profiling_enabled():
+    return os.environ.get("MECHCAD_PROFILE", "").lower() in ("1", "true", "yes")
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class Metrics:
+    def __init__(self, window=WINDOW):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._counters = Counter()
+        self._slow = deque(maxlen=SLOW_KEEP)
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, component=ALL):
+        with self._lock:
+            self._samples[stage, component].append(seconds)
+            if component != ALL:
+                self._samples[stage, ALL].append(seconds)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def record(self, component, params, timings, profile=None):
+        """Observe every stage of one request and remember it if it was slow."""
+        for stage, seconds in timings.items():
+            self.observe(stage, seconds, component)
+        total = timings.get("total", sum(timings.values()))
+        if total >= slow_seconds():
+            with self._lock:
+                self._slow.append({"time": time.time(), "component": component, "params": params,
+                                   "timings": dict(timings), "profile": profile})
+
+    def summary(self):
+        with self._lock:
+            samples = {key: sorted(values) for key, values in self._samples.items()}
+            counters = dict(self._counters)
+            slow = list(self._slow)
+        stages = [{
+            "stage": stage, "component": component, "count": len(values),
+            "p50": percentile(values, 50), "p90": percentile(values, 90),
+            "p99": percentile(values, 99), "max": values[-1],
+        } for (stage, component), values in sorted(samples.items())]
+        return {"stages": stages, "counters": counters, "slow": slow[::-1]}
+
+
+@functools.lru_cache(maxsize=None)
+def default_metrics():
+    """The process-wide metrics shared by the engine, the HTTP server and the UI."""
+    return Metrics()
+
+
+def profiled(func, label, *args, **kwargs):
+    """Call ``func`` under cProfile and keep the dump only if it ran longer than the slow threshold.
+
+    Returns ``(result, path)``; ``path`` is None when nothing was written.
+    """
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    result = profiler.runcall(func, *args, **kwargs)
+    if time.perf_counter() - start < slow_seconds():
+        return result, None
+    directory = os.path.join(default_cache().directory, "profiles")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{label}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.prof")
+    profiler.dump_stats(path)
+    return result, path
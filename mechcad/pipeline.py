@@ -0,0 +1,152 @@
+"""The one generation pipeline: validate, build, export and cache a part.
+
+The Streamlit UI, batch jobs and the command line all call :func:`generate`,
+so caching, timing and parallelism only have to be implemented here. The CAD
+stack is only imported once a part actually has to be built.
+"""
+import gzip
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from mechcad import components  # noqa: F401  (registers the built-in parts)
+from mechcad.cache import cache_key, default_cache, normalize
+from mechcad.registry import ValidationError, find
+
+
+MESH_TOLERANCE = 0.1  # mm, default chordal deviation of STL and GLB meshes
+# finer meshes explode in size and time (and the build-time estimate ignores tolerance)
+MIN_TOLERANCE = 0.005
+MAX_TOLERANCE = 5.0
+
+# output format -> MIME type
+FORMATS = {
+    "step": "application/step",
+    "step.gz": "application/gzip",
+    "stl": "model/stl",
+    "glb": "model/gltf-binary",
+}
+MESH_FORMATS = ("stl", "glb")
+
+
+@dataclass
+class GeneratedFile:
+    data: bytes
+    name: str
+    key: str
+    cached: bool = False
+    timings: dict = field(default_factory=dict)
+    profile: Optional[str] = None  # cProfile dump of a slow build, see mechcad.metrics
+
+
+def prepare(component, raw_params):
+    """Look up ``component`` (class name or label) and return it with its coerced, validated parameters."""
+    comp = find(component)
+    params = comp.coerce(raw_params)
+    comp.check(params)
+    return comp, params
+
+
+def part_key(component, raw_params):
+    comp, params = prepare(component, raw_params)
+    return cache_key(comp.name, params)
+
+
+def build(component, raw_params):
+    comp, params = prepare(component, raw_params)
+    return comp.build(params)
+
+
+def load_shape(comp, params, key, cache):
+    """Return the built shape, reading it back from the cached BREP when possible."""
+    from mechcad.export import from_brep_bytes, to_brep_bytes, to_shape
+    data = cache.get(key, fmt="brep", count=False)
+    if data is not None:
+        return from_brep_bytes(data)
+    shape = to_shape(comp.build(params))
+    cache.put(key, to_brep_bytes(shape), fmt="brep")
+    return shape
+
+
+def check_tolerance(tolerance):
+    """Return ``tolerance`` (mm, None for the default) as a float, or raise ValidationError."""
+    if tolerance is None:
+        return MESH_TOLERANCE
+    try:
+        tolerance = float(tolerance)
+    except (TypeError, ValueError):
+        raise ValidationError(f"Mesh tolerance must be a number, got {tolerance!r}") from None
+    if not MIN_TOLERANCE <= tolerance <= MAX_TOLERANCE:
+        raise ValidationError(f"Mesh tolerance must be between {MIN_TOLERANCE:g} and {MAX_TOLERANCE:g} mm, "
+                              f"got {tolerance:g}")
+    return tolerance
+
+
+def cache_format(fmt, tolerance=MESH_TOLERANCE):
+    """Cache entry format of an output format; meshes are cached per tessellation tolerance."""
+    return f"{fmt}-{normalize(tolerance):g}" if fmt in MESH_FORMATS else fmt
+
+
+def file_name(comp, params, fmt="step"):
+    return comp.file_name(params).rsplit(".", 1)[0] + "." + fmt
+
+
+def _produce(comp, params, key, fmt, tolerance, cache, timings):
+    if fmt == "step.gz":
+        # derived from the STEP bytes, never from the shape
+        step = cache.get(key, count=False)
+        if step is None:
+            step = _produce(comp, params, key, "step", tolerance, cache, timings)
+            cache.put(key, step)
+        start = time.perf_counter()
+        data = gzip.compress(step, compresslevel=6, mtime=0)
+        timings["compress"] = time.perf_counter() - start
+        return data
+
+    from mechcad import export
+    start = time.perf_counter()
+    shape = load_shape(comp, params, key, cache)
+    timings["build"] = time.perf_counter() - start
+    start = time.perf_counter()
+    if fmt == "step":
+        data = export.to_step_bytes(shape)
+        timings["export"] = time.perf_counter() - start
+    else:
+        data = export.to_stl_bytes(shape, tolerance) if fmt == "stl" else export.to_glb_bytes(shape, tolerance)
+        timings["tessellate"] = time.perf_counter() - start
+    return data
+
+
+def generate(component, raw_params, cache=None, lookup=True, fmt="step", tolerance=MESH_TOLERANCE):
+    """Return a part in ``fmt`` (see FORMATS), building it only on a cache miss.
+
+    Every format is made lazily from the cached shape (or, for gzip STEP,
+    from the cached STEP bytes) and cached on its own, so asking for another
+    format never rebuilds the part. ``lookup=False`` skips the cache read,
+    for callers that already checked it.
+    """
+    if fmt not in FORMATS:
+        raise ValidationError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    cache = default_cache() if cache is None else cache
+    comp, params = prepare(component, raw_params)
+    if fmt in MESH_FORMATS:
+        tolerance = check_tolerance(tolerance)
+    key = cache_key(comp.name, params)
+    name = file_name(comp, params, fmt)
+    entry = cache_format(fmt, tolerance)
+
+    if lookup:
+        start = time.perf_counter()
+        data = cache.get(key, fmt=entry)
+        if data is not None:
+            return GeneratedFile(data, name, key, cached=True, timings={"cache": time.perf_counter() - start})
+
+    timings = {}
+    data = _produce(comp, params, key, fmt, tolerance, cache, timings)
+    cache.put(key, data, fmt=entry)
+    return GeneratedFile(data, name, key, timings=timings)
+
+
+def generate_mesh(component, raw_params, tolerance=MESH_TOLERANCE, cache=None, lookup=True):
+    """GLB mesh of a part for the 3D viewer, tessellated from the same cached shape as the STEP file."""
+    return generate(component, raw_params, cache, lookup, fmt="glb", tolerance=tolerance)
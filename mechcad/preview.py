@@ -0,0 +1,252 @@
+"""Instant previews drawn with NumPy instead of OCC.
+
+Gears are previewed as their 2D tooth outline (involute flanks, tip and root
+circles, bore), fasteners and bearings as a coarse mesh revolved from
+approximate ISO proportions of their size designation. Both are returned as
+SVG, so a preview costs milliseconds and never touches the CAD stack; the
+STEP file is only built when the user presses Generate.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from mechcad.catalog import size_dimensions
+from mechcad import gearmath
+from mechcad.gearmath import ADDENDUM, DEDENDUM, PRESSURE_ANGLE
+
+FILL = "#6fa8dc"
+STROKE = "#cfe2f3"
+LIGHT = np.array([-0.3, 0.5, 0.8])
+
+# a closed, counter-clockwise (r, z) profile revolved with ``segments`` facets (6 makes a hex prism)
+Body = namedtuple("Body", "profile segments")
+
+#-----------------------------------------------Gear outlines------------------------------------------------------------
+
+
+def _involute(alpha):
+    return np.tan(alpha) - alpha
+
+
+def circle(radius, points=96):
+    t = np.linspace(0.0, 2 * np.pi, points, endpoint=False)
+    return np.column_stack([radius * np.cos(t), radius * np.sin(t)])
+
+
+def tooth_outline(module, teeth, r_low, r_high, pressure_angle=PRESSURE_ANGLE, steps=8):
+    """Closed outline of ``teeth`` involute teeth running from ``r_low`` to ``r_high``.
+
+    For an external gear these are the root and tip radii. An internal gear
+    uses the same outline, because its tooth spaces are shaped like the
+    teeth of the matching external gear.
+    """
+    alpha = np.radians(pressure_angle)
+    rp = module * teeth / 2.0
+    rb = rp * np.cos(alpha)
+    psi = np.pi / (2 * teeth)  # half tooth thickness at the pitch circle, as an angle
+
+    r = np.linspace(max(r_low, rb), r_high, steps)
+    half = psi + _involute(alpha) - _involute(np.arccos(np.clip(rb / r, -1.0, 1.0)))
+    if r_low < rb:
+        # radial flank below the base circle
+        r = np.concatenate([[r_low], r])
+        half = np.concatenate([[half[0]], half])
+    tip = np.linspace(-half[-1], half[-1], steps)[1:-1]
+    root = np.linspace(half[0], 2 * np.pi / teeth - half[0], steps)[1:-1]
+
+    angles = np.concatenate([-half, tip, half[::-1], root])
+    radii = np.concatenate([r, np.full(tip.size, r_high), r[::-1], np.full(root.size, r_low)])
+    angles = (angles[None, :] + 2 * np.pi * np.arange(teeth)[:, None]).ravel()
+    radii = np.tile(radii, teeth)
+    return np.column_stack([radii * np.cos(angles), radii * np.sin(angles)])
+
+
+def spur_outline(module, teeth, bore_d=0.0):
+    rp = module * teeth / 2.0
+    loops = [tooth_outline(module, teeth, rp - DEDENDUM * module, rp + ADDENDUM * module)]
+    if bore_d > 0:
+        loops.append(circle(bore_d / 2.0))
+    return loops
+
+
+def ring_outline(module, teeth, rim_width):
+    rp = module * teeth / 2.0
+    root = rp + DEDENDUM * module
+    return [circle(root + rim_width, 192), tooth_outline(module, teeth, rp - ADDENDUM * module, root)]
+
+
+def rack_profile(module, length, pressure_angle=PRESSURE_ANGLE):
+    """Tooth line of a rack between x=0 and ``length``, pitch line at y=0."""
+    pitch = np.pi * module
+    slope = np.tan(np.radians(pressure_angle))
+    top = pitch / 2 - 2 * ADDENDUM * module * slope
+    bottom = pitch / 2 + 2 * DEDENDUM * module * slope
+    centers = pitch * (np.arange(int(np.ceil(length / pitch)) + 3) - 1) + pitch / 2
+    x = (centers[:, None] + np.array([-bottom, -top, top, bottom]) / 2).ravel()
+    y = np.tile([-DEDENDUM * module, ADDENDUM * module, ADDENDUM * module, -DEDENDUM * module], centers.size)
+    inside = (x > 0) & (x < length)
+    xs = np.concatenate([[0.0], x[inside], [length]])
+    return np.column_stack([xs, np.interp(xs, x, y)])
+
+
+def rack_outline(module, length, height):
+    teeth = rack_profile(module, length)
+    teeth[:, 1] += height + DEDENDUM * module
+    return [np.vstack([[[0.0, 0.0]], teeth, [[length, 0.0]]])]
+
+
+def worm_outline(module, lead_angle, n_threads, length, bore_d=0.0):
+    """Axial section of a worm: rack-shaped threads above and below the axis."""
+    rp = float(gearmath.derive("Worm", {"module": module, "lead_angle": lead_angle, "n_threads": n_threads})["pitch_d"]) / 2
+    profile = rack_profile(module, length)
+    upper = profile + [0.0, rp]
+    lower = (profile * [1, -1] - [0.0, rp])[::-1]
+    loops = [np.vstack([upper, lower])]
+    if bore_d > 0:
+        loops.append(np.array([[0.0, -bore_d / 2], [length, -bore_d / 2], [length, bore_d / 2],
+                               [0.0, bore_d / 2]]))
+    return loops
+
+
+def gear_outline(component, p):
+    """2D outline loops of a registered gear, or None for an unknown one."""
+    if component == "SpurGear":
+        return spur_outline(p["module"], p["teeth_number"], p["bore_d"])
+    if component == "CrossedHelicalGear":
+        # transverse section: the module grows with the helix angle
+        return spur_outline(p["module"] / np.cos(np.radians(p["helix_angle"])), p["teeth_number"], p["bore_d"])
+    if component == "BevelGear":
+        # the large end of the cone carries the nominal module
+        return spur_outline(p["module"], p["teeth_number"], p["bore_d"])
+    if component == "RingGear":
+        return ring_outline(p["module"], p["teeth_number"], p["rim_width"])
+    if component == "RackGear":
+        return rack_outline(p["module"], p["length"], p["height"])
+    if component == "Worm":
+        return worm_outline(p["module"], p["lead_angle"], p["n_threads"], p["length"], p["bore_d"])
+    return None
+
+
+def outline_svg(loops, size=360, margin=8):
+    points = np.vstack(loops)
+    lo, hi = points.min(axis=0), points.max(axis=0)
+    scale = (size - 2 * margin) / max(hi - lo)
+    width, height = (hi - lo) * scale + 2 * margin
+    path = " ".join(
+        "M " + " L ".join(f"{(x - lo[0]) * scale + margin:.2f},{(hi[1] - y) * scale + margin:.2f}" for x, y in loop)
+        + " Z" for loop in loops)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}" '
+            f'viewBox="0 0 {width:.2f} {height:.2f}"><path d="{path}" fill="{FILL}" fill-opacity="0.8" '
+            f'fill-rule="evenodd" stroke="{STROKE}" stroke-width="1"/></svg>')
+
+#-----------------------------------------------Coarse meshes------------------------------------------------------------
+
+
+def revolve(body):
+    """Vertices (N, 3) and quads (M, 4) of a profile revolved about Z."""
+    profile = np.asarray(body.profile, dtype=float)
+    t = np.pi / body.segments + 2 * np.pi * np.arange(body.segments) / body.segments
+    r, z = profile[:, 0:1], profile[:, 1:2]
+    vertices = np.stack([r * np.cos(t), r * np.sin(t), np.repeat(z, body.segments, axis=1)],
+                        axis=-1).reshape(-1, 3)
+    s = body.segments
+    i, k = np.meshgrid(np.arange(len(profile) - 1), np.arange(s), indexing="ij")
+    # counter-clockwise (r, z) profiles give outward-facing quads
+    quads = np.stack([i * s + k, i * s + (k + 1) % s, (i + 1) * s + (k + 1) % s, (i + 1) * s + k],
+                     axis=-1).reshape(-1, 4)
+    return vertices, quads
+
+
+def _ring(r_in, r_out, z0, z1, segments=24):
+    return Body([(r_in, z0), (r_out, z0), (r_out, z1), (r_in, z1), (r_in, z0)], segments)
+
+
+def _hex_radius(across_flats):
+    return across_flats / np.sqrt(3)
+
+
+def part_bodies(component, category, p):
+    """Approximate bodies of a catalog part from its size designation, or None."""
+    dims = size_dimensions(category, p.get("size") or "")
+    if category == "Bearing":
+        if not dims:
+            return None
+        d, outer, width = dims["d"], dims["D"], dims["B"]
+        wall = (outer - d) / 6
+        return [_ring(d / 2, d / 2 + wall, 0, width), _ring(outer / 2 - wall, outer / 2, 0, width),
+                _ring(d / 2 + wall, outer / 2 - wall, 0.3 * width, 0.7 * width)]
+    if not dims:
+        return None
+    d = dims["diameter"]
+    s = 1.6 * d  # across flats
+    if category == "Nut":
+        if component == "SquareNut":
+            return [_ring(d / 2, s / np.sqrt(2), 0, 0.8 * d, segments=4)]
+        if component == "HeatSetNut":
+            return [_ring(d / 2, 0.7 * d, 0, 1.5 * d)]
+        bodies = [_ring(d / 2, _hex_radius(s), 0, 0.8 * d, segments=6)]
+        if component == "DomedCapNut":
+            a = np.linspace(0, np.pi / 2, 6)
+            dome = [(0.45 * s * np.cos(t), 0.8 * d + 0.45 * s * np.sin(t)) for t in a]
+            bodies.append(Body([(0.0, 0.8 * d)] + dome, 16))
+        return bodies
+    if category == "Screw":
+        length = p.get("length") or 2 * d
+        shank = Body([(0.0, -length), (d / 2, -length), (d / 2, 0.0), (0.0, 0.0)], 16)
+        if component == "SetScrew":
+            return [Body([(0.0, -length), (d / 2, -length), (d / 2, 0.0), (0.0, 0.0), (0.0, -length)], 16)]
+        if component == "CounterSunkScrew":
+            return [shank, Body([(0.0, -0.6 * d), (d / 2, -0.6 * d), (d, 0.0), (0.0, 0.0)], 24)]
+        if component == "HexHeadScrew":
+            return [shank, Body([(0.0, 0.0), (_hex_radius(s), 0.0), (_hex_radius(s), 0.7 * d), (0.0, 0.7 * d)], 6)]
+        if component == "PanHeadScrew":
+            return [shank, Body([(0.0, 0.0), (d, 0.0), (d, 0.4 * d), (0.8 * d, 0.6 * d), (0.0, 0.6 * d)], 24)]
+        return [shank, Body([(0.0, 0.0), (0.75 * d, 0.0), (0.75 * d, d), (0.0, d)], 24)]
+    if category == "Washer":
+        return [_ring(0.54 * d, d, 0, 0.2 * d)]
+    return None
+
+
+def mesh_svg(bodies, size=360, margin=8, elevation=30.0, azimuth=35.0):
+    """Flat-shaded isometric rendering of the revolved bodies."""
+    faces = []
+    for body in bodies:
+        vertices, quads = revolve(body)
+        faces.append(vertices[quads])
+    faces = np.concatenate(faces)  # (M, 4, 3)
+
+    az, el = np.radians(azimuth), np.radians(elevation)
+    spin = np.array([[np.cos(az), -np.sin(az), 0], [np.sin(az), np.cos(az), 0], [0, 0, 1]])
+    tilt = np.array([[1, 0, 0], [0, np.sin(el), np.cos(el)], [0, -np.cos(el), np.sin(el)]])
+    view = faces @ (tilt @ spin).T  # x right, y up, z towards the viewer
+
+    # degenerate quads (on the axis) have no normal; back faces are culled
+    normals = np.cross(view[:, 2] - view[:, 0], view[:, 3] - view[:, 1])
+    lengths = np.linalg.norm(normals, axis=1)
+    visible = (lengths > 1e-12) & (normals[:, 2] > 0)
+    view, normals = view[visible], normals[visible] / lengths[visible, None]
+    # painter's algorithm: farthest faces first
+    order = np.argsort(view[:, :, 2].mean(axis=1))
+    view, normals = view[order], normals[order]
+    shades = 0.35 + 0.65 * np.abs(normals @ (LIGHT / np.linalg.norm(LIGHT)))
+
+    points = view[:, :, :2].reshape(-1, 2)
+    lo, hi = points.min(axis=0), points.max(axis=0)
+    scale = (size - 2 * margin) / max(hi - lo)
+    width, height = (hi - lo) * scale + 2 * margin
+    polygons = []
+    for face, shade in zip(view, shades):
+        rgb = ",".join(str(int(c * shade)) for c in (111, 168, 220))
+        pts = " ".join(f"{(x - lo[0]) * scale + margin:.1f},{(hi[1] - y) * scale + margin:.1f}" for x, y in face[:, :2])
+        polygons.append(f'<polygon points="{pts}" fill="rgb({rgb})" stroke="rgb({rgb})" stroke-width="0.5"/>')
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}" '
+            f'viewBox="0 0 {width:.2f} {height:.2f}">{"".join(polygons)}</svg>')
+
+
+def preview_svg(comp, params):
+    """SVG preview of a registered component with validated ``params``, or None if it has none."""
+    if comp.category == "Gear":
+        loops = gear_outline(comp.name, params)
+        return None if loops is None else outline_svg(loops)
+    bodies = part_bodies(comp.name, comp.category, params)
+    return None if bodies is None else mesh_svg(bodies)
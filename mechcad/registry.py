@@ -0,0 +1,105 @@
+"""Component registry shared by the UI, the batch API and the CLI.
+
+Each component declares its parameter schema, an optional validation rule
+and a build function returning a cadquery shape. Everything that generates
+a part goes through :mod:`mechcad.pipeline`, which looks components up here.
+"""
+import importlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class ValidationError(ValueError):
+    """Raised when a parameter set cannot produce a valid part."""
+
+
+@dataclass(frozen=True)
+class Param:
+    name: str
+    label: str
+    kind: str = "float"  # "float", "int", "bool" or "str"
+    default: Any = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    step: Optional[float] = None
+    help: Optional[str] = None
+
+    def coerce(self, value):
+        if value is None or value == "":
+            if self.default is None:
+                raise ValidationError(f"Missing value for '{self.name}'.")
+            value = self.default
+        if self.kind == "bool":
+            if isinstance(value, str):
+                value = value.strip().lower() in ("1", "true", "yes", "y", "on")
+            return bool(value)
+        if self.kind == "str":
+            return str(value).strip()
+        try:
+            value = int(float(value)) if self.kind == "int" else float(value)
+        except (TypeError, ValueError):
+            raise ValidationError(f"'{self.name}' must be a number, got {value!r}.")
+        if self.min_value is not None and value < self.min_value:
+            raise ValidationError(f"'{self.name}' must be at least {self.min_value}.")
+        if self.max_value is not None and value > self.max_value:
+            raise ValidationError(f"'{self.name}' must be at most {self.max_value}.")
+        return value
+
+
+@dataclass(frozen=True)
+class Component:
+    name: str
+    label: str
+    category: str
+    params: Tuple[Param, ...]
+    build: Callable[[Dict[str, Any]], Any]
+    file_name: Callable[[Dict[str, Any]], str]
+    validate: Optional[Callable[[Dict[str, Any]], None]] = None
+    source: Optional[str] = None  # "module:Class" of the generating class, imported on first use
+
+    @property
+    def cls(self):
+        module, _, name = self.source.partition(":")
+        return getattr(importlib.import_module(module), name)
+
+    def coerce(self, raw):
+        """Return a complete, typed parameter dict; unknown keys are rejected."""
+        known = {p.name for p in self.params}
+        unknown = set(raw) - known
+        if unknown:
+            raise ValidationError(f"Unknown parameter(s) for {self.name}: {', '.join(sorted(unknown))}.")
+        return {p.name: p.coerce(raw.get(p.name)) for p in self.params}
+
+    def check(self, params):
+        if self.validate is not None:
+            self.validate(params)
+
+
+REGISTRY: Dict[str, Component] = {}
+
+
+def register(component):
+    if component.name in REGISTRY:
+        raise ValueError(f"Component {component.name} is already registered")
+    REGISTRY[component.name] = component
+    return component
+
+
+def get(name):
+    try:
+        return REGISTRY[name]
+    except KeyError:
+        raise ValidationError(f"Unknown component '{name}'.") from None
+
+
+def find(name):
+    """Look a component up by class name or UI label, ignoring case and spaces."""
+    wanted = "".join(str(name).split()).lower()
+    for component in REGISTRY.values():
+        if wanted in (component.name.lower(), "".join(component.label.split()).lower()):
+            return component
+    raise ValidationError(f"Unknown component '{name}'.")
+
+
+def by_category(category):
+    return {c.label: c for c in REGISTRY.values() if c.category == category}
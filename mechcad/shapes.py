@@ -0,0 +1,81 @@
+"""Cache of intermediate geometry reused across parts.
+
+Some sub-shapes are expensive and shared by many parts: a thread segment
+serves every screw of that size whatever its length, and a gear's toothed
+body serves every bore diameter. Such shapes are
+cached in two tiers under their own cache key: a small per-process LRU of
+live shapes (worker processes are long-lived, so repeated requests skip
+even the BREP read) and the shared on-disk cache as BREP, so other
+processes and restarts reuse them too.
+"""
+import contextlib
+import functools
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from mechcad.cache import PartCache, cache_key, default_cache
+
+DEFAULT_MEMORY_ENTRIES = 64
+
+
+class ShapeCache:
+    def __init__(self, cache=None, entries=DEFAULT_MEMORY_ENTRIES):
+        self._cache = cache
+        self.entries = entries
+        self._shapes = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return default_cache() if self._cache is None else self._cache
+
+    def get(self, kind, params, make):
+        """The shape ``make()`` returns for ``(kind, params)``, built at most once per cache lifetime."""
+        key = cache_key(kind, params)
+        with self._lock:
+            shape = self._shapes.get(key)
+            if shape is not None:
+                self._shapes.move_to_end(key)
+                return shape
+
+        from mechcad.export import from_brep_bytes, to_brep_bytes, to_shape
+        data = self.cache.get(key, fmt="brep", count=False)
+        if data is not None:
+            shape = from_brep_bytes(data)
+        else:
+            shape = to_shape(make())
+            self.cache.put(key, to_brep_bytes(shape), fmt="brep")
+
+        with self._lock:
+            self._shapes[key] = shape
+            while len(self._shapes) > self.entries:
+                self._shapes.popitem(last=False)
+        return shape
+
+
+_isolated = None
+
+
+def default_shapes():
+    return _shared_shapes() if _isolated is None else _isolated
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_shapes():
+    entries = os.environ.get("MECHCAD_SHAPE_CACHE_ENTRIES")
+    return ShapeCache(entries=int(entries) if entries else DEFAULT_MEMORY_ENTRIES)
+
+
+@contextlib.contextmanager
+def isolated():
+    """Send :func:`default_shapes` to an empty, throwaway cache, so builds inside start cold."""
+    global _isolated
+    previous = _isolated
+    with tempfile.TemporaryDirectory(prefix="mechcad-shapes-") as directory:
+        _isolated = ShapeCache(PartCache(directory))
+        try:
+            yield _isolated
+        finally:
+            _isolated = previous
@@ -0,0 +1,142 @@
+"""Parameter sweeps: a family of gears from value ranges.
+
+Every parameter takes a single value, a list (``0.5,1,1.5``) or an
+inclusive range (``12:80`` or ``12:80:2``). The cartesian product is
+expanded into NumPy arrays and checked in one pass by
+:func:`mechcad.gearmath.problems`, the same rules the single-gear
+validators apply, so invalid combinations are dropped before anything is
+built. Valid gears go through the batch machinery
+(parallel builds, streamed ZIP) and the archive ends with a manifest of
+every combination's parameters and outcome.
+"""
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+
+from mechcad import batch, gearmath
+from mechcad.registry import ValidationError, find
+
+MAX_COMBINATIONS = 100_000  # expanded, before pruning
+MAX_PARTS = 2000  # valid combinations that would be built
+
+
+def parse_values(param, spec):
+    """1-D array of the values ``spec`` stands for, coerced to ``param``'s kind."""
+    if isinstance(spec, dict):
+        spec = f"{spec['start']}:{spec['stop']}:{spec.get('step', 1)}"
+    try:
+        if isinstance(spec, str):
+            text = spec.strip()
+            if ":" in text:
+                parts = [float(v) for v in text.split(":")]
+                if len(parts) not in (2, 3):
+                    raise ValueError
+                start, stop = parts[:2]
+                step = parts[2] if len(parts) == 3 else 1.0
+                if step <= 0 or stop < start:
+                    raise ValueError
+                values = np.round(np.arange(start, stop + step / 2, step), 10)
+            else:
+                values = np.array([float(v) for v in text.split(",") if v.strip()])
+        else:
+            values = np.atleast_1d(np.asarray(spec, dtype=float))
+    except (TypeError, ValueError):
+        raise ValidationError(f"Invalid values for {param.label}: {spec!r}. "
+                              "Use a value, a list like 0.5,1,1.5 or a range like 12:80:2.") from None
+    if values.size == 0:
+        raise ValidationError(f"No values given for {param.label}.")
+    if param.kind == "int":
+        values = np.round(values).astype(int)
+    return np.unique(values)
+
+
+@dataclass
+class Sweep:
+    component: str
+    swept: List[str]
+    grid: Dict[str, np.ndarray]  # parameter -> one value per combination
+    reasons: np.ndarray  # "" for valid combinations
+    names: List[str] = field(default_factory=list)
+
+    @property
+    def valid(self):
+        return self.reasons == ""
+
+    def params(self, index):
+        return {name: values[index].item() for name, values in self.grid.items()}
+
+    def rows(self):
+        """A BomRow per valid combination."""
+        return [batch.BomRow(self.component, self.params(i), name=self.names[i])
+                for i in np.flatnonzero(self.valid)]
+
+
+def expand(component, ranges, max_parts=MAX_PARTS):
+    """Expand ``ranges`` (parameter -> value spec) for a gear and prune the invalid combinations."""
+    comp = find(component)
+    if comp.category != "Gear":
+        raise ValidationError("Sweeps are only available for gears.")
+    by_name = {p.name: p for p in comp.params}
+    unknown = set(ranges) - set(by_name)
+    if unknown:
+        raise ValidationError(f"Unknown parameter(s) for {comp.label}: {', '.join(sorted(unknown))}")
+
+    axes = {name: parse_values(p, ranges[name]) if name in ranges else np.array([p.default])
+            for name, p in by_name.items()}
+    total = int(np.prod([values.size for values in axes.values()]))
+    if total > MAX_COMBINATIONS:
+        raise ValidationError(f"The sweep has {total} combinations; the limit is {MAX_COMBINATIONS}.")
+    mesh = np.meshgrid(*axes.values(), indexing="ij")
+    grid = {name: values.ravel() for name, values in zip(axes, mesh)}
+
+    reasons = np.full(total, "", dtype=object)
+    for name, p in by_name.items():
+        if p.min_value is not None:
+            reasons[(reasons == "") & (grid[name] < p.min_value)] = f"{p.label} is below {p.min_value}"
+        if p.max_value is not None:
+            reasons[(reasons == "") & (grid[name] > p.max_value)] = f"{p.label} is above {p.max_value}"
+    unchecked = reasons == ""
+    reasons[unchecked] = gearmath.problems(comp.name, {name: values[unchecked] for name, values in grid.items()})
+
+    valid = int((reasons == "").sum())
+    if valid > max_parts:
+        raise ValidationError(f"The sweep has {valid} valid gears; the limit is {max_parts}.")
+
+    swept = [name for name, values in axes.items() if values.size > 1]
+    stem = comp.file_name(comp.coerce({})).rsplit(".", 1)[0]
+    names = [stem + "".join(f"_{name}{grid[name][i]:g}" for name in swept) + ".step" for i in range(total)]
+    return Sweep(comp.name, swept, grid, reasons, names)
+
+
+def manifest_csv(sweep, results=None):
+    """One line per combination: file, outcome and every parameter value.
+
+    Without ``results`` valid combinations are listed as "valid" (a dry run).
+    """
+    outcome = {r.name: r for r in results or ()}
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["file", "status", "error"] + list(sweep.grid))
+    for i, name in enumerate(sweep.names):
+        if sweep.reasons[i]:
+            status, error, name = "invalid", sweep.reasons[i], ""
+        elif results is None:
+            status, error = "valid", ""
+        else:
+            result = outcome.get(name)
+            status, error = (result.state, result.error or "") if result else ("missing", "")
+        writer.writerow([name, status, error] + [f"{values[i]:g}" for values in sweep.grid.values()])
+    return out.getvalue()
+
+
+def iter_archive(sweep, results):
+    """Stream the ZIP of a sweep's ``results``, ending with manifest.csv and sweep.json."""
+    def extra(seen):
+        summary = {"component": sweep.component, "swept": sweep.swept, "combinations": len(sweep.names),
+                   "valid": int(sweep.valid.sum()), "built": sum(1 for r in seen if r.ok)}
+        return {"manifest.csv": manifest_csv(sweep, seen), "sweep.json": json.dumps(summary, indent=2)}
+    return batch.iter_zip(results, extra)
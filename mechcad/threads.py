@@ -0,0 +1,87 @@
+"""Threaded nuts and screws assembled from cached thread segments.
+
+cq_warehouse sweeps a fresh helical thread for every threaded fastener,
+which is by far the slowest build in the app, although screws of one size
+that differ only in length share identical thread geometry. Here a thread
+segment of :data:`SEGMENT_PITCHES` whole turns with square ends is built
+once per (diameter, pitch, internal/external) and cached
+(:mod:`mechcad.shapes`). A thread of any length is stacked from copies of
+it, which meet exactly because the segment length is a whole number of
+pitches, and clipped to length with one boolean. Threads are right-handed,
+like cq_warehouse's fasteners. The fastener body is cq_warehouse's ``simple``
+version with the thread region cut away, so a threaded build costs about
+as much as a simple one once the segment is cached.
+
+Nuts and screws whose thread does not simply span the body (domed cap and
+heat set nuts, countersunk screws) keep cq_warehouse's own threads.
+"""
+import math
+
+from mechcad.catalog import size_dimensions
+from mechcad.shapes import default_shapes
+
+SEGMENT_PITCHES = 8
+
+# classes whose thread runs over the full nut height / the full shank below z = 0
+THREADED_NUTS = ("HexNut", "SquareNut")
+THREADED_SCREWS = ("SocketHeadCapScrew", "PanHeadScrew", "HexHeadScrew", "SetScrew")
+
+MARGIN = 0.01  # mm, so cuts overlap the simple body's cylinder faces
+
+
+def minor_diameter(diameter, pitch):
+    """ISO 68-1 minor diameter of an external thread (d3)."""
+    return diameter - 1.22687 * pitch
+
+
+def segment(diameter, pitch, external=True):
+    """A cached right-hand thread of SEGMENT_PITCHES turns from z = 0, with square ends."""
+    def make():
+        from cq_warehouse.thread import IsoThread
+        thread = IsoThread(major_diameter=diameter, pitch=pitch, length=SEGMENT_PITCHES * pitch,
+                           external=external, end_finishes=("square", "square"))
+        return getattr(thread, "cq_object", thread)
+    return default_shapes().get("ThreadSegment", {"diameter": diameter, "pitch": pitch, "external": external,
+                                                  "turns": SEGMENT_PITCHES, "ends": "square"}, make)
+
+
+def thread(diameter, pitch, length, external=True, z=0.0):
+    """A thread from ``z`` to ``z + length`` stacked from cached segments."""
+    import cadquery as cq
+    piece = segment(diameter, pitch, external)
+    step = SEGMENT_PITCHES * pitch
+    count = max(math.ceil(length / step - 1e-9), 1)
+    stacked = cq.Compound.makeCompound([piece.translate(cq.Vector(0, 0, z + i * step)) for i in range(count)])
+    # clipped even when the length is a whole number of segments, so nothing pokes past the body
+    radius = diameter / 2 + 1
+    return stacked.intersect(cq.Solid.makeBox(2 * radius, 2 * radius, length, cq.Vector(-radius, -radius, z)))
+
+
+def supported(component, size):
+    return component in THREADED_NUTS + THREADED_SCREWS and "pitch" in size_dimensions("Fastener", size)
+
+
+def threaded(cls, component, params):
+    """The threaded fastener: the simple body with its thread region replaced by a cached thread."""
+    import cadquery as cq
+    dims = size_dimensions("Fastener", params["size"])
+    diameter, pitch = dims["diameter"], dims["pitch"]
+    kwargs = {"size": params["size"], "fastener_type": params["fastener_type"], "simple": True}
+    if component in THREADED_SCREWS:
+        kwargs["length"] = params["length"]
+    body = cls(**kwargs)
+    bb = body.BoundingBox()
+
+    if component in THREADED_NUTS:
+        height = bb.zlen
+        hole = cq.Solid.makeCylinder(diameter / 2, height + 2 * MARGIN, cq.Vector(0, 0, bb.zmin - MARGIN))
+        core = body.cut(hole)
+        helix = thread(diameter, pitch, height, external=False, z=bb.zmin)
+    else:
+        length = params["length"]
+        outer = cq.Solid.makeCylinder(diameter / 2 + MARGIN, length + MARGIN, cq.Vector(0, 0, -length - MARGIN))
+        inner = cq.Solid.makeCylinder(minor_diameter(diameter, pitch) / 2, length + 2 * MARGIN,
+                                      cq.Vector(0, 0, -length - MARGIN))
+        core = body.cut(outer.cut(inner))
+        helix = thread(diameter, pitch, length, external=True, z=-length)
+    return cq.Compound.makeCompound([core, helix])
@@ -0,0 +1,66 @@
+"""Deploy-time warm-up: pre-build popular parts into the STEP cache.
+
+The part list comes from a BOM file, from the most requested parts in the
+request log, and by default from :data:`POPULAR_PARTS` (common metric
+screws, nuts and washers, 6000/6200-series deep groove bearings and
+module 1-2 spur gears). Parts are built in parallel by the worker engine.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import List
+
+from mechcad import batch, history
+
+METRIC = ("M3-0.5", "M4-0.7", "M5-0.8", "M6-1", "M8-1.25")
+SCREW_LENGTHS = (6, 8, 10, 12, 16, 20, 25, 30)
+# SKT designations d-D-B of the 6000 and 6200 series (bores 10-25 mm)
+DEEP_GROOVE = ("M10-26-8", "M12-28-8", "M15-32-9", "M17-35-10", "M20-42-12", "M25-47-12",
+               "M10-30-9", "M12-32-10", "M15-35-11", "M17-40-12", "M20-47-14", "M25-52-15")
+SPUR_MODULES = (1.0, 1.5, 2.0)
+SPUR_TEETH = (12, 16, 20, 24, 30, 40)
+
+POPULAR_PARTS = (
+    [{"component": "SocketHeadCapScrew", "size": s, "fastener_type": "iso4762", "length": n}
+     for s in METRIC for n in SCREW_LENGTHS]
+    + [{"component": "HexNut", "size": s, "fastener_type": "iso4032"} for s in METRIC]
+    + [{"component": "PlainWasher", "size": s.split("-")[0], "fastener_type": "iso7089"} for s in METRIC]
+    + [{"component": "SingleRowDeepGrooveBallBearing", "size": s} for s in DEEP_GROOVE]
+    + [{"component": "SpurGear", "module": m, "teeth_number": z} for m in SPUR_MODULES for z in SPUR_TEETH]
+)
+
+
+@dataclass
+class WarmupReport:
+    parts: int = 0
+    built: int = 0
+    cached: int = 0
+    failures: List[batch.PartResult] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+def warmup_rows(parts_file=None, top=0, history_file=None, defaults=True):
+    rows = [batch.row_from_record(record) for record in POPULAR_PARTS] if defaults else []
+    if parts_file:
+        with open(parts_file, "rb") as f:
+            rows += batch.read_bom(f.read(), parts_file)
+    if top:
+        rows += [batch.BomRow(component, params) for component, params, _count in history.top_requests(top, history_file)]
+    return rows
+
+
+def run_warmup(rows, engine, progress=None):
+    """Build ``rows`` into the cache and return a WarmupReport; ``progress`` gets each PartResult."""
+    report = WarmupReport()
+    start = time.perf_counter()
+    for result in batch.run_batch(rows, engine):
+        report.parts += 1
+        if not result.ok:
+            report.failures.append(result)
+        elif result.cached:
+            report.cached += 1
+        else:
+            report.built += 1
+        if progress is not None:
+            progress(result)
+    report.seconds = time.perf_counter() - start
+    return report
@@ -0,0 +1,194 @@
+"""A pool of warm worker processes whose running tasks can be killed.
+
+``ProcessPoolExecutor`` cannot stop a task once a worker has picked it up,
+and killing one of its workers breaks the whole pool. Here each worker is
+a spawned process fed through its own pipe by a slot thread in the parent.
+A running task is stopped by terminating its process, either on
+:meth:`WorkerPool.kill` or when its wall-clock ``timeout`` expires; the
+slot then carries on with the queue and starts a fresh process (which
+imports the CAD stack again) for its next task. A worker that crashes,
+or cannot be started, only fails its own task.
+"""
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+POLL_SECONDS = 0.1
+
+
+class BuildKilled(RuntimeError):
+    """A task was cancelled, timed out or lost its worker process."""
+
+
+class BuildCancelled(BuildKilled):
+    """A task was cancelled on request (:meth:`WorkerPool.kill`)."""
+
+
+def _serve(conn, initializer):
+    if initializer is not None:
+        initializer()
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        fn, args, kwargs = task
+        try:
+            result = (True, fn(*args, **kwargs))
+        except BaseException as e:
+            result = (False, e)
+        try:
+            conn.send(result)
+        except Exception as e:  # unpicklable result or exception
+            conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class _Slot:
+    def __init__(self, pool, index):
+        self._pool = pool
+        self._process = None
+        self._conn = None
+        self._kill_error = None
+        self.future = None
+        self._thread = threading.Thread(target=self._loop, name=f"mechcad-worker-{index}", daemon=True)
+        self._thread.start()
+
+    def _start(self):
+        context = self._pool.context
+        self._conn, child = context.Pipe()
+        self._process = context.Process(target=_serve, args=(child, self._pool.initializer), daemon=True)
+        self._process.start()
+        child.close()
+
+    def _stop(self, kill=False):
+        if self._process is None:
+            return
+        if kill:
+            self._process.kill()
+        else:
+            try:
+                self._conn.send(None)
+            except OSError:
+                pass
+        self._process.join(5)
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+        self._conn.close()
+        self._process = self._conn = None
+
+    def kill(self, error):
+        self._kill_error = error
+
+    def _loop(self):
+        while True:
+            task = self._pool.tasks.get()
+            if task is None:
+                break
+            future, fn, args, kwargs, timeout = task
+            self._kill_error = None
+            self.future = future
+            if not future.set_running_or_notify_cancel():
+                self.future = None
+                continue
+            try:
+                self._run(future, fn, args, kwargs, timeout)
+            except Exception as e:  # never lose the slot or leave the caller waiting
+                if not future.done():
+                    future.set_exception(BuildKilled(f"Worker failure: {type(e).__name__}: {e}"))
+                try:
+                    self._stop(kill=True)
+                except Exception:
+                    self._process = self._conn = None
+            finally:
+                self.future = None
+        self._stop()
+
+    def _run(self, future, fn, args, kwargs, timeout):
+        if self._process is None:
+            try:
+                self._start()
+            except Exception as e:  # e.g. an unpicklable initializer, or out of processes
+                self._process = self._conn = None
+                future.set_exception(BuildKilled(f"Could not start a worker process: {e}"))
+                return
+        try:
+            self._conn.send((fn, args, kwargs))
+        except OSError:
+            self._stop(kill=True)
+            future.set_exception(BuildKilled("The worker process died."))
+            return
+        except Exception as e:  # unpicklable arguments
+            future.set_exception(e)
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                ready = self._conn.poll(POLL_SECONDS)
+                if ready:
+                    ok, value = self._conn.recv()
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+                    return
+            except (EOFError, OSError):
+                # the next task starts a fresh process
+                future.set_exception(BuildKilled("The worker process died."))
+                self._stop(kill=True)
+                return
+            error = self._kill_error
+            if error is None and deadline is not None and time.monotonic() > deadline:
+                error = BuildKilled(f"Timed out after {timeout:g} s.")
+            if error is not None:
+                future.set_exception(error)
+                self._stop(kill=True)
+                return
+
+
+class WorkerPool:
+    def __init__(self, max_workers, initializer=None, context=None):
+        self.context = context or multiprocessing.get_context("spawn")
+        self.initializer = initializer
+        self.tasks = queue.Queue()
+        self._slots = [_Slot(self, index) for index in range(max_workers)]
+
+    def submit(self, fn, *args, timeout=None, future=None, **kwargs):
+        """Queue ``fn(*args, **kwargs)``; it is killed after ``timeout`` seconds of running.
+
+        The result is delivered to ``future`` if one is given, else to a new Future.
+        """
+        future = Future() if future is None else future
+        self.tasks.put((future, fn, args, kwargs, timeout))
+        return future
+
+    def kill(self, future, reason="Cancelled."):
+        """Cancel a queued task or kill the process running it; False if it already finished."""
+        if future.cancel():
+            return True
+        for slot in self._slots:
+            if slot.future is future:
+                slot.kill(BuildCancelled(reason))
+                return True
+        return False
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        if cancel_futures:
+            while True:
+                try:
+                    task = self.tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if task is not None:
+                    task[0].cancel()
+        for slot in self._slots:
+            if slot.future is not None and cancel_futures:
+                slot.kill(BuildKilled("Shut down."))
+            self.tasks.put(None)
+        if wait:
+            for slot in self._slots:
+                slot._thread.join()
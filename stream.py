@@ -1,21 +1,16 @@
-import streamlit as st
-import cadquery as cq
+import base64
+import threading
+import time
+import uuid
 import numpy as np
-from cq_gears import SpurGear
-from cq_gears import BevelGear
-from cq_gears import CrossedHelicalGear
-from cq_gears import RackGear
-from cq_gears import RingGear
-from cq_gears import Worm
-from cq_warehouse.fastener import (Nut, Screw, Washer,
-    HexNut, DomedCapNut, SquareNut, HeatSetNut,
-    SocketHeadCapScrew, CounterSunkScrew, PanHeadScrew, HexHeadScrew, SetScrew,
-    PlainWasher, ChamferedWasher)
-from cq_warehouse.bearing import (Bearing, SingleRowDeepGrooveBallBearing,
-    SingleRowCappedDeepGrooveBallBearing,SingleRowAngularContactBallBearing,
-    SingleRowCylindricalRollerBearing,SingleRowTaperedRollerBearing)
-import tempfile
-import os
+import streamlit as st
+import streamlit.components.v1 as components
+from mechcad import batch, gearmath, geartrain, preview, sweep
+from mechcad.blobs import default_blobs
+from mechcad.cache import default_cache
+from mechcad.catalog import get_catalog
+from mechcad.engine import DONE, FAILED, QUEUED, GenerationEngine
+from mechcad.registry import REGISTRY, ValidationError, by_category
 
 
 st.markdown("""<style>.stApp {background: linear-gradient(135deg, #000000, #0f2027, #2c5364);background-attachment: fixed;}</style>""",unsafe_allow_html=True)
@@ -24,25 +19,256 @@ st.markdown("<h1 style='text-align: center; color: gray;'><i>MechCAD Stop</h1>",
 st.divider()
 
 
+@st.cache_resource
+def get_engine():
+    engine = GenerationEngine()
+    engine.warm()
+    return engine
+
+
+@st.cache_resource
+def prewarm():
+    # runs once per server process, after the first page has been drawn
+    stats = {}
+    def run():
+        start = time.perf_counter()
+        get_catalog()
+        stats["catalog_seconds"] = time.perf_counter() - start
+    threading.Thread(target=run, name="mechcad-prewarm", daemon=True).start()
+    return stats
+
+
 if 'generated_file' not in st.session_state:
     st.session_state.generated_file = None
+if 'job' not in st.session_state:
+    st.session_state.job = None
+if 'user_id' not in st.session_state:
+    # the admission policy caps concurrent builds per browser session
+    st.session_state.user_id = uuid.uuid4().hex
 def clear_download_state():
+    # abandoned jobs still finish into the cache, but the engine need not keep their bytes
+    if st.session_state.get("job"):
+        get_engine().forget(st.session_state.job)
+    conversion = st.session_state.get("conversion")
+    if conversion:
+        get_engine().forget(conversion["job"])
     st.session_state.generated_file = None
+    st.session_state.gearset_file = None
+    st.session_state.job = None
+    st.session_state.conversion = None
+
+
+def download_blob(label, blob, file_name, mime="application/octet-stream"):
+    # sessions hold only the digest; the bytes are read from the shared blob store when the button is drawn
+    # (Streamlit keeps its own copy only while the button is on screen)
+    f = default_blobs().open(blob)
+    if f is None:
+        st.button(label, disabled=True, help="This file has expired; generate it again.")
+        return
+    with f:
+        st.download_button(label, data=f, file_name=file_name, mime=mime)
+
+
+def param_inputs(component, params):
+    cols = st.columns(len(params))
+    values = {}
+    for col, param in zip(cols, params):
+        values[param.name] = col.number_input(param.label, value=param.default, min_value=param.min_value,
+                                              max_value=param.max_value, step=param.step, help=param.help,
+                                              key=f"{component.name}_{param.name}")
+    return values
+
+
+DOWNLOAD_FORMATS = {"STEP": "step", "STEP (gzip)": "step.gz", "STL": "stl", "GLB": "glb"}
+MESH_DETAIL = {"Coarse": 0.5, "Normal": 0.1, "Fine": 0.02}  # tessellation tolerance in mm
+VIEWER_HTML = """
+<script type="module" src="https://ajax.googleapis.com/ajax/libs/model-viewer/3.5.0/model-viewer.min.js"></script>
+<model-viewer src="data:model/gltf-binary;base64,{data}" camera-controls shadow-intensity="0.6"
+    exposure="1.1" style="width: 100%; height: 400px; background: transparent;"></model-viewer>
+"""
+
+
+def converted_file(generated, fmt, tolerance=None):
+    # converted from the cached shape or STEP bytes once per session and format, through a polled job;
+    # returns {"blob", "name"} or {"error"}, or None while the conversion is still running
+    key = fmt if tolerance is None else f"{fmt}@{tolerance:g}"
+    formats = generated.setdefault("formats", {})
+    if key in formats or st.session_state.get("conversion"):
+        return formats.get(key)
+    part = generated["part"]
+    engine = get_engine()
+    try:
+        if fmt == "glb":
+            job_id = engine.submit_mesh(part["component"], part["params"], tolerance, user=st.session_state.user_id)
+        else:
+            job_id = engine.submit(part["component"], part["params"], fmt, tolerance,
+                                   user=st.session_state.user_id, record=False)
+    except Exception as e:
+        # not kept: a refusal such as a full queue may pass on the next rerun
+        return {"error": str(e)}
+    st.session_state.conversion = {"job": job_id, "key": key, "source": generated["blob"]}
+    return None
+
+
+def poll_conversion():
+    conversion = st.session_state.conversion
+    engine = get_engine()
+    try:
+        status = engine.status(conversion["job"])
+    except KeyError:
+        st.session_state.conversion = None
+        return
+    if status.state not in (DONE, FAILED):
+        st.caption(f"Converting... {status.elapsed:.1f} s")
+        return
+    engine.forget(conversion["job"])
+    st.session_state.conversion = None
+    generated = st.session_state.generated_file
+    if generated and generated["blob"] == conversion["source"]:
+        if status.state == DONE:
+            converted = {"blob": default_blobs().put(status.result.data), "name": status.result.name}
+        else:
+            converted = {"error": status.error}
+        generated.setdefault("formats", {})[conversion["key"]] = converted
+    st.rerun()
+
+
+def show_viewer(generated):
+    # tessellated from the cached shape once per detail level, then kept in the session's formats
+    if not st.checkbox("Show 3D view", value=False, key="show_viewer"):
+        return
+    detail = st.select_slider("Mesh detail", list(MESH_DETAIL), value="Normal", key="mesh_detail")
+    mesh = converted_file(generated, "glb", MESH_DETAIL[detail])
+    if mesh is None:
+        st.info("Tessellating...")
+        return
+    if "error" in mesh:
+        st.error(f"Could not tessellate the part: {mesh['error']}")
+        return
+    f = default_blobs().open(mesh["blob"])
+    if f is None:
+        st.info("The mesh has expired; generate the part again to view it.")
+        return
+    with f:
+        data = f.read()
+    components.html(VIEWER_HTML.format(data=base64.b64encode(data).decode("ascii")), height=410)
+    st.caption(f"Mesh: {len(data) / 1024:.0f} KiB ({detail.lower()} detail, {MESH_DETAIL[detail]} mm)")
+
+
+def poll_job():
+    engine = get_engine()
+    try:
+        status = engine.status(st.session_state.job)
+    except KeyError:
+        st.session_state.job = None
+        return
+    if status.state == DONE:
+        start = time.perf_counter()
+        st.session_state.generated_file = {
+            "blob": default_blobs().put(status.result.data), "name": status.result.name,
+            "part": st.session_state.get("job_part"),
+        }
+        # the engine would otherwise hold the bytes until the job expires
+        engine.forget(st.session_state.job)
+        engine.metrics.observe("session", time.perf_counter() - start)
+        st.session_state.job = None
+        st.session_state.job_message = ("success", "File ready!")
+        st.rerun()
+    elif status.state == FAILED:
+        engine.forget(st.session_state.job)
+        st.session_state.job = None
+        st.session_state.job_message = ("error", f"An error occurred: {status.error}")
+        st.rerun()
+    else:
+        expected = f" (about {status.estimate:.0f} s expected)" if status.estimate and status.estimate >= 5 else ""
+        if status.position:
+            st.info(f"Waiting for one of your builds to finish: number {status.position} in your queue... "
+                    f"{status.elapsed:.1f} s")
+        elif status.state == QUEUED:
+            st.info(f"Waiting for a free worker... {status.elapsed:.1f} s")
+        else:
+            st.info(f"Generating... {status.elapsed:.1f} s{expected}")
+        if st.button("Cancel", key="cancel_job"):
+            engine.cancel(st.session_state.job)
+            engine.forget(st.session_state.job)
+            st.session_state.job = None
+            st.session_state.job_message = ("error", "Generation cancelled.")
+            st.rerun()
+
+
+def show_preview(component, params):
+    # NumPy-only sketch: costs milliseconds, so it follows every input change
+    if component is None or not st.checkbox("Show preview", value=True, key=f"preview_{component.category}"):
+        return
+    start = time.perf_counter()
+    try:
+        checked = component.coerce(params)
+        component.check(checked)
+        svg = preview.preview_svg(component, checked)
+    except ValidationError as e:
+        st.caption(f"No preview: {e}")
+        return
+    if svg:
+        st.image(svg)
+        st.caption(f"Approximate preview ({(time.perf_counter() - start) * 1000:.0f} ms). "
+                   "Generate builds the exact STEP model.")
+
+
+def generate_buttons(label, component, params, disabled=False):
+    estimate = None if disabled or component is None else get_engine().estimate(component.name, params)
+    if estimate is not None and estimate >= 5:
+        st.caption(f"Estimated build time: about {estimate:.0f} s (instant if this part was built before).")
+    btn_cols = st.columns(2)
+    with btn_cols[0]:
+        if st.button(label, disabled=disabled or bool(st.session_state.job)):
+            clear_download_state()
+            try:
+                st.session_state.job = get_engine().submit(component.name, params, user=st.session_state.user_id)
+                st.session_state.job_part = {"component": component.name, "params": params}
+            except ValidationError as e:
+                st.error(str(e))
+            except Exception as e:
+                st.error(f"An error occurred: {e}")
+        message = st.session_state.pop("job_message", None)
+        if message:
+            kind, text = message
+            if kind == "success":
+                st.success(text)
+            else:
+                st.error(text)
+    with btn_cols[1]:
+        generated = st.session_state.generated_file
+        if generated:
+            fmt = "STEP"
+            if generated.get("part"):
+                fmt = st.selectbox("Format", list(DOWNLOAD_FORMATS), key="download_format",
+                                   label_visibility="collapsed")
+            converted = generated
+            if DOWNLOAD_FORMATS[fmt] != "step":
+                converted = converted_file(generated, DOWNLOAD_FORMATS[fmt])
+            if converted is None:
+                st.button(f"Download {fmt} File", disabled=True, help="Converting...")
+            elif "error" in converted:
+                st.error(f"Could not convert the part: {converted['error']}")
+            else:
+                download_blob(f"Download {fmt} File", converted["blob"], converted["name"])
+        else:
+            st.button("Download STEP File", disabled=True)
+    if st.session_state.job:
+        st.fragment(poll_job, run_every=0.5)()
+    elif st.session_state.generated_file and st.session_state.generated_file.get("part"):
+        show_viewer(st.session_state.generated_file)
+    if st.session_state.get("conversion"):
+        st.fragment(poll_conversion, run_every=0.5)()
 
 
-option = st.selectbox("Select your component",("Bearing", "Gear","Fastener"),index=None, placeholder="Select a component type...",on_change=clear_download_state)
+option = st.selectbox("Select your component",("Bearing", "Gear","Gear Set","Fastener","Batch (BOM)"),index=None, placeholder="Select a component type...",on_change=clear_download_state)
 
 #-----------------------------------------------Bearing------------------------------------------------------------------
 
 if option == "Bearing":
     st.subheader("Bearing Specifications")
-    BEARING_CLASSES = {
-        "Single Row Deep Groove Ball Bearing": SingleRowDeepGrooveBallBearing,
-        "Single Row Capped DeepGrooveBall Bearing": SingleRowCappedDeepGrooveBallBearing,
-        "Single Row Angular Contact BallBearing": SingleRowAngularContactBallBearing,
-        "Single Row Cylindrical Roller Bearing": SingleRowCylindricalRollerBearing,
-        "Single Row Tapered Roller Bearing": SingleRowTaperedRollerBearing
-    }
+    BEARING_CLASSES = by_category("Bearing")
 
     cols = st.columns(2)
     class_name = cols[0].selectbox("Bearing Class", list(BEARING_CLASSES.keys()), index=None, key="bearing_class")
@@ -50,7 +276,7 @@ if option == "Bearing":
     bearing_sizes = []
     if class_name:
         try:
-            bearing_sizes = list(BEARING_CLASSES[class_name].sizes("SKT"))
+            bearing_sizes = get_catalog().sizes(BEARING_CLASSES[class_name].name, "SKT")
         except Exception:
             st.error(f"Could not load sizes for {class_name}")
 
@@ -59,342 +285,113 @@ if option == "Bearing":
 
     st.caption("(All bearings are as per SKT standard)")
 
-    btn_cols = st.columns(2)
-    with btn_cols[0]:
-        if st.button(f"Generate Bearing", disabled=not bearing_size):
-            try:
-                instance = BEARING_CLASSES[class_name](size=bearing_size, bearing_type="SKT")
-                temp_dir = tempfile.gettempdir()
-                file_name = f"{class_name}_{bearing_size}.step"
-                temp_path = os.path.join(temp_dir, file_name)
-                cq.exporters.export(instance.cq_object, temp_path)
-
-                with open(temp_path, "rb") as f:
-                    st.session_state.generated_file = {
-                        "data": f.read(), "name": file_name, "label": f"Download STEP File"
-                    }
-                st.success("File ready!")
-            except Exception as e:
-                st.error(f"An error occurred: {e}")
-                clear_download_state()
-            finally:
-                if 'temp_path' in locals() and os.path.exists(temp_path):
-                    os.remove(temp_path)
-    with btn_cols[1]:
-        if st.session_state.generated_file:
-            st.download_button(
-                label=st.session_state.generated_file["label"],
-                data=st.session_state.generated_file["data"],
-                file_name=st.session_state.generated_file["name"],
-                mime="application/octet-stream"
-            )
-        else:
-            st.button("Download STEP File", disabled=True)
+    if bearing_size:
+        show_preview(BEARING_CLASSES.get(class_name), {"size": bearing_size, "bearing_type": "SKT"})
+
+    generate_buttons("Generate Bearing", BEARING_CLASSES.get(class_name),
+                     {"size": bearing_size, "bearing_type": "SKT"}, disabled=not bearing_size)
 
 #-----------------------------------------------------------Gear----------------------------------------------------------------------------
 if option == "Gear":
-    gear_type = st.selectbox("Select type of gear",("Spur Gear", "Bevel Gear", "Crossed Helical Gear", "Rack Gear", "Ring Gear", "Worm Gear"),index=None,placeholder="Select a gear type...",on_change=clear_download_state)
+    GEAR_CLASSES = by_category("Gear")
+    gear_type = st.selectbox("Select type of gear",tuple(GEAR_CLASSES.keys()),index=None,placeholder="Select a gear type...",on_change=clear_download_state)
     st.header("  ", divider="gray")
 
+    if gear_type:
+        gear = GEAR_CLASSES[gear_type]
+        st.subheader(f"{gear_type} Specifications")
+        gear_params = param_inputs(gear, gear.params)
+        # derived sizes and validity update on every input change, before anything is built
+        dims = gearmath.derive(gear.name, gear_params)
+        labels = {"pitch_d": "Pitch Ø", "tip_d": "Tip Ø", "root_d": "Root Ø", "max_bore_d": "Max bore Ø",
+                  "center_distance": "Cone distance" if gear.name == "BevelGear" else "Center distance*"}
+        summary = [f"{label} {float(dims[key]):.2f} mm" for key, label in labels.items()
+                   if not np.isnan(dims[key])]
+        if not np.isnan(dims["contact_ratio"]):
+            summary.append(f"Contact ratio* {float(dims['contact_ratio']):.2f}")
+            summary.append("*with an identical mating gear")
+        if summary:
+            st.caption(" · ".join(summary))
+        problem = gearmath.problems(gear.name, gear_params).item()
+        if problem:
+            st.error(problem)
+        show_preview(gear, gear_params)
+        generate_buttons("Generate Gear", gear, gear_params, disabled=bool(problem))
+
+        with st.expander("Parameter sweep"):
+            st.caption("Enter a value, a list (0.5,1,1.5) or an inclusive range (12:80 or 12:80:2) for each "
+                       "parameter. Invalid combinations are pruned before anything is built.")
+            sweep_cols = st.columns(len(gear.params))
+            ranges = {p.name: col.text_input(p.label, value=f"{gear_params[p.name]:g}", key=f"sweep_{gear.name}_{p.name}")
+                      for col, p in zip(sweep_cols, gear.params)}
+            family = None
+            try:
+                family = sweep.expand(gear.name, ranges)
+                valid = int(family.valid.sum())
+                st.caption(f"{len(family.names)} combinations: {valid} valid, {len(family.names) - valid} pruned")
+            except ValidationError as e:
+                st.error(str(e))
+            if st.button("Generate Sweep", disabled=family is None or not family.valid.any()):
+                st.session_state.sweep_file = None
+                rows = family.rows()
+                progress = st.progress(0.0, text="Generating gears...")
+                finished = []
+
+                def tracked(results_iter):
+                    for result in results_iter:
+                        finished.append(result)
+                        progress.progress(len(finished) / len(rows), text=f"{len(finished)}/{len(rows)} gears finished")
+                        yield result
+
+                results_iter = batch.run_batch(rows, get_engine(), user=st.session_state.user_id)
+                archive = b"".join(sweep.iter_archive(family, tracked(results_iter)))
+                st.session_state.sweep_file = {"blob": default_blobs().put(archive),
+                                               "failed": sum(1 for r in finished if not r.ok)}
+            if st.session_state.get("sweep_file"):
+                if st.session_state.sweep_file["failed"]:
+                    st.warning(f"{st.session_state.sweep_file['failed']} gear(s) failed; see manifest.csv.")
+                download_blob("Download Sweep ZIP", st.session_state.sweep_file["blob"],
+                              f"{gear.name.lower()}_sweep.zip", "application/zip")
+
+
+#----------------------------------GEAR SET------------------------------------------------------------------------------
+if option == "Gear Set":
+    SETS = {g.label: g for g in geartrain.GEAR_SETS.values()}
+    set_label = st.selectbox("Select type of gear set", list(SETS), index=None, placeholder="Select a gear set...",
+                             on_change=clear_download_state)
+    st.header("  ", divider="gray")
 
-    if gear_type == "Spur Gear":
-        st.subheader("Spur Gear Specifications")
-        cols = st.columns(4)
-        module = cols[0].number_input("Module", value=1.0, min_value=0.1, step=0.1)
-        teeth_number = cols[1].number_input("Number of Teeth", value=19, min_value=3, step=1)
-        width = cols[2].number_input("Thickness (mm)", value=5.0, min_value=0.1, step=0.5)
-        bore_d = cols[3].number_input("Bore Diameter (mm)", value=5.0, min_value=0.0, step=0.5)
-
-        btn_cols = st.columns(2)
-        with btn_cols[0]:
-            if st.button("Generate Gear"):
-                max_bore_d = module * (teeth_number - 2.5)
-                if bore_d >= max_bore_d:
-                    st.error(f"Bore Diameter is too large. Maximum is {max_bore_d:.2f} mm.")
-                    clear_download_state()
-                else:
-                    temp_dir = tempfile.gettempdir()
-                    temp_path = os.path.join(temp_dir, "spur_gear.step")
-                    try:
-                        spur_gear = SpurGear(module=module, teeth_number=teeth_number, width=width, bore_d=bore_d)
-                        wp = cq.Workplane('XY').gear(spur_gear)
-                        cq.exporters.export(wp, temp_path, 'STEP')
-                        with open(temp_path, "rb") as f:
-                            st.session_state.generated_file = {
-                                "data": f.read(),
-                                "name": "spur_gear.step",
-                                "label": "Download STEP File"
-                            }
-                        st.success("File ready!")
-                    except Exception as e:
-                        st.error(f"An error occurred: {e}")
-                        clear_download_state()
-                    finally:
-                        if os.path.exists(temp_path):
-                            os.remove(temp_path)
-        with btn_cols[1]:
-            if st.session_state.generated_file:
-                st.download_button(
-                    label=st.session_state.generated_file["label"],
-                    data=st.session_state.generated_file["data"],
-                    file_name=st.session_state.generated_file["name"],
-                    mime="application/octet-stream"
-                )
-            else:
-                st.button("Download STEP File", disabled=True)
-
-
-    elif gear_type == "Bevel Gear":
-        st.subheader("Bevel Gear Specifications")
-        cols = st.columns(5)
-        module = cols[0].number_input("Module", value=1.0, min_value=0.1, step=0.1)
-        teeth_number = cols[1].number_input("Number of Teeth", value=25, min_value=5, step=1)
-        cone_angle = cols[2].number_input("Cone Angle (°)", value=45.0, min_value=1.0, max_value=179.0, step=1.0)
-        face_width = cols[3].number_input("Face Width (mm)", value=8.0, min_value=1.0, step=0.5)
-        bore_d = cols[4].number_input("Bore Diameter (mm)", value=5.0, min_value=0.0, step=0.5)
-
-        btn_cols = st.columns(2)
-        with btn_cols[0]:
-            if st.button("Generate Gear"):
-                try:
-                    gamma_p = np.radians(cone_angle)
-                    rp = module * teeth_number / 2.0
-                    gs_r = rp / np.sin(gamma_p)
-
-                    if face_width >= gs_r:
-                        st.error(f"Face Width is too large. Must be less than {gs_r:.2f} mm.")
-                        clear_download_state()
-                    else:
-                        temp_dir = tempfile.gettempdir()
-                        temp_path = os.path.join(temp_dir, "bevel_gear.step")
-                        try:
-                            bevel_gear = BevelGear(module=module, teeth_number=teeth_number,
-                                                   cone_angle=cone_angle, face_width=face_width)
-                            gear_body = bevel_gear.build(bore_d=bore_d)
-                            wp = cq.Workplane('XY').add(gear_body)
-                            cq.exporters.export(wp, temp_path, 'STEP')
-                            with open(temp_path, "rb") as f:
-                                st.session_state.generated_file = {
-                                    "data": f.read(),
-                                    "name": "bevel_gear.step",
-                                    "label": "Download STEP File"
-                                }
-                            st.success("File ready!")
-                        except Exception as e:
-                            st.error(f"An error occurred during generation: {e}")
-                            clear_download_state()
-                        finally:
-                            if os.path.exists(temp_path):
-                                os.remove(temp_path)
-                except Exception as e:
-                    st.error(f"A validation error occurred: {e}")
-                    clear_download_state()
-        with btn_cols[1]:
-            if st.session_state.generated_file:
-                st.download_button(
-                    label=st.session_state.generated_file["label"],
-                    data=st.session_state.generated_file["data"],
-                    file_name=st.session_state.generated_file["name"],
-                    mime="application/octet-stream"
-                )
-            else:
-                st.button("Download STEP File", disabled=True)
-
-
-    elif gear_type == "Crossed Helical Gear":
-        st.subheader("Crossed Helical Gear Specifications")
-        cols = st.columns(5)
-        module = cols[0].number_input("Module", value=1.0, min_value=0.1, step=0.1)
-        teeth_number = cols[1].number_input("Number of Teeth", value=20, min_value=3, step=1)
-        width = cols[2].number_input("Width (mm)", value=10.0, min_value=1.0, step=0.5)
-        helix_angle = cols[3].number_input("Helix Angle (°)", value=45.0, min_value=-89.0, max_value=89.0, step=1.0)
-        bore_d = cols[4].number_input("Bore Diameter (mm)", value=5.0, min_value=0.0, step=0.5)
-
-        btn_cols = st.columns(2)
-        with btn_cols[0]:
-            if st.button("Generate Gear"):
-                try:
-                    h_angle_rad = np.radians(helix_angle)
-                    transverse_module = module / np.cos(h_angle_rad)
-                    max_bore_d = transverse_module * (teeth_number - 2.5)
-                    if bore_d >= max_bore_d:
-                        st.error(f"Bore Diameter is too large. Maximum is {max_bore_d:.2f} mm.")
-                        clear_download_state()
-                    else:
-                        temp_dir = tempfile.gettempdir()
-                        temp_path = os.path.join(temp_dir, "crossed_helical_gear.step")
-                        try:
-                            ch_gear = CrossedHelicalGear(module=module, teeth_number=teeth_number,
-                                                         width=width, helix_angle=helix_angle)
-                            gear_body = ch_gear.build(bore_d=bore_d)
-                            wp = cq.Workplane('XY').add(gear_body)
-                            cq.exporters.export(wp, temp_path, 'STEP')
-                            with open(temp_path, "rb") as f:
-                                st.session_state.generated_file = {
-                                    "data": f.read(),
-                                    "name": "crossed_helical_gear.step",
-                                    "label": "Download STEP File"
-                                }
-                            st.success("File ready!")
-                        except Exception as e:
-                            st.error(f"An error occurred during generation: {e}")
-                            clear_download_state()
-                        finally:
-                            if os.path.exists(temp_path):
-                                os.remove(temp_path)
-                except Exception as e:
-                    st.error(f"A validation error occurred: {e}")
-                    clear_download_state()
-        with btn_cols[1]:
-            if st.session_state.generated_file:
-                st.download_button(
-                    label=st.session_state.generated_file["label"],
-                    data=st.session_state.generated_file["data"],
-                    file_name=st.session_state.generated_file["name"],
-                    mime="application/octet-stream"
-                )
-            else:
-                st.button("Download STEP File", disabled=True)
-
-
-    elif gear_type == "Ring Gear":
-        st.subheader("Ring Gear Specifications")
-        cols = st.columns(4)
-        module = cols[0].number_input("Module", value=1.0, min_value=0.1, step=0.1)
-        teeth_number = cols[1].number_input("Number of Teeth", value=60, min_value=10, step=1)
-        width = cols[2].number_input("Width (mm)", value=10.0, min_value=1.0, step=0.5)
-        rim_width = cols[3].number_input("Rim Width (mm)", value=5.0, min_value=1.0, step=0.5,
-                                         help="The thickness of the solid outer ring.")
-
-        btn_cols = st.columns(2)
-        with btn_cols[0]:
-            if st.button("Generate Gear"):
-                temp_dir = tempfile.gettempdir()
-                temp_path = os.path.join(temp_dir, "ring_gear.step")
-                try:
-                    ring_gear = RingGear(module=module,
-                                         teeth_number=teeth_number,
-                                         width=width,
-                                         rim_width=rim_width)
-                    gear_body = ring_gear.build()
-                    wp = cq.Workplane('XY').add(gear_body)
-                    cq.exporters.export(wp, temp_path, 'STEP')
-                    with open(temp_path, "rb") as f:
-                        st.session_state.generated_file = {
-                            "data": f.read(),
-                            "name": "ring_gear.step",
-                            "label": "Download STEP File"
-                        }
-                    st.success("File ready!")
-                except Exception as e:
-                    st.error(f"An error occurred during generation: {e}")
-                    clear_download_state()
-                finally:
-                    if os.path.exists(temp_path):
-                        os.remove(temp_path)
-        with btn_cols[1]:
-            if st.session_state.generated_file:
-                st.download_button(
-                    label=st.session_state.generated_file["label"],
-                    data=st.session_state.generated_file["data"],
-                    file_name=st.session_state.generated_file["name"],
-                    mime="application/octet-stream"
-                )
-            else:
-                st.button("Download STEP File", disabled=True)
-
-
-    elif gear_type == "Rack Gear":
-        st.subheader("Rack Gear Specifications")
-        cols = st.columns(4)
-        module = cols[0].number_input("Module", value=1.0, min_value=0.1, step=0.1)
-        length = cols[1].number_input("Length (mm)", value=100.0, min_value=10.0, step=1.0)
-        width = cols[2].number_input("Width (mm)", value=10.0, min_value=1.0, step=0.5)
-        height = cols[3].number_input("Height (mm)", value=5.0, min_value=1.0, step=0.5,
-                                      help="The total height of the rack base, excluding teeth.")
-        btn_cols = st.columns(2)
-        with btn_cols[0]:
-            if st.button("Generate Gear"):
-                temp_dir = tempfile.gettempdir()
-                temp_path = os.path.join(temp_dir, "rack_gear.step")
-                try:
-                    rack_gear = RackGear(module=module,
-                                         length=length,
-                                         width=width,
-                                         height=height)
-                    gear_body = rack_gear.build()
-                    wp = cq.Workplane('XY').add(gear_body)
-                    cq.exporters.export(wp, temp_path, 'STEP')
-                    with open(temp_path, "rb") as f:
-                        st.session_state.generated_file = {
-                            "data": f.read(),
-                            "name": "rack_gear.step",
-                            "label": "Download STEP File"
-                        }
-                    st.success("File ready!")
-                except Exception as e:
-                    st.error(f"An error occurred during generation: {e}")
-                    clear_download_state()
-                finally:
-                    if os.path.exists(temp_path):
-                        os.remove(temp_path)
-        with btn_cols[1]:
-            if st.session_state.generated_file:
-                st.download_button(
-                    label=st.session_state.generated_file["label"],
-                    data=st.session_state.generated_file["data"],
-                    file_name=st.session_state.generated_file["name"],
-                    mime="application/octet-stream"
-                )
-            else:
-                st.button("Download STEP File", disabled=True)
-
-
-    elif gear_type == "Worm Gear":
-        st.subheader("Worm Gear Specifications")
-        cols = st.columns(5)
-        module = cols[0].number_input("Module", value=1.0, min_value=0.1, step=0.1)
-        lead_angle = cols[1].number_input("Lead Angle (°)", value=10.0, min_value=1.0, max_value=89.0, step=1.0)
-        n_threads = cols[2].number_input("Number of Threads", value=1, min_value=1, step=1)
-        length = cols[3].number_input("Length (mm)", value=50.0, min_value=5.0, step=1.0)
-        bore_d = cols[4].number_input("Bore Diameter (mm)", value=8.0, min_value=0.0, step=0.5)
+    if set_label:
+        gear_set = SETS[set_label]
+        st.subheader(f"{set_label} Specifications")
+        half = (len(gear_set.params) + 1) // 2
+        set_params = param_inputs(gear_set, gear_set.params[:half])
+        set_params.update(param_inputs(gear_set, gear_set.params[half:]))
+        plan = None
+        try:
+            _, _, plan = geartrain.layout(gear_set.name, set_params)
+            st.caption(" · ".join(f"{label} {value:.4g}" for label, value in plan.info.items()))
+        except ValidationError as e:
+            st.error(str(e))
 
         btn_cols = st.columns(2)
         with btn_cols[0]:
-            if st.button("Generate Gear"):
-                temp_dir = tempfile.gettempdir()
-                temp_path = os.path.join(temp_dir, "worm_gear.step")
+            if st.button("Generate Gear Set", disabled=plan is None):
+                st.session_state.gearset_file = None
                 try:
-                    worm_gear = Worm(module=module,
-                                     lead_angle=lead_angle,
-                                     n_threads=n_threads,
-                                     length=length)
-                    gear_body = worm_gear.build(bore_d=bore_d)
-                    wp = cq.Workplane('XY').add(gear_body)
-                    cq.exporters.export(wp, temp_path, 'STEP')
-                    with open(temp_path, "rb") as f:
-                        st.session_state.generated_file = {
-                            "data": f.read(),
-                            "name": "worm_gear.step",
-                            "label": "Download STEP File"
-                        }
-                    st.success("File ready!")
+                    with st.spinner(f"Building {len(plan.rows)} gears..."):
+                        result = geartrain.generate(get_engine(), gear_set.name, set_params,
+                                                    user=st.session_state.user_id)
+                    st.session_state.gearset_file = {"blob": default_blobs().put(result.data), "name": result.name}
+                    st.success("Assembly ready!")
                 except Exception as e:
-                    st.error(f"An error occurred during generation: {e}")
-                    clear_download_state()
-                finally:
-                    if os.path.exists(temp_path):
-                        os.remove(temp_path)
+                    st.error(f"An error occurred: {e}")
         with btn_cols[1]:
-            if st.session_state.generated_file:
-                st.download_button(
-                    label=st.session_state.generated_file["label"],
-                    data=st.session_state.generated_file["data"],
-                    file_name=st.session_state.generated_file["name"],
-                    mime="application/octet-stream"
-                )
+            if st.session_state.get("gearset_file"):
+                download_blob("Download Assembly STEP", st.session_state.gearset_file["blob"],
+                              st.session_state.gearset_file["name"])
             else:
-                st.button("Download STEP File", disabled=True)
+                st.button("Download Assembly STEP", disabled=True)
 
 
 #----------------------------------FASTNER-------------------------------------------------------------------------------
@@ -409,186 +406,186 @@ if option == "Fastener":
     )
     st.header("  ", divider="gray")
 
-
-    if fastener_category == "Nut":
-        st.subheader("Nut Specifications")
-        NUT_CLASSES = {"Hex Nut": HexNut, "Domed Cap Nut": DomedCapNut, "Square Nut": SquareNut, "Heat Set Nut": HeatSetNut}
+    if fastener_category:
+        st.subheader(f"{fastener_category} Specifications")
+        FASTENER_CLASSES = by_category(fastener_category)
+        prefix = fastener_category.lower()
 
         cols = st.columns(3)
-        class_name = cols[0].selectbox("Nut Class", list(NUT_CLASSES.keys()), index=None, key="nut_class")
+        class_name = cols[0].selectbox(f"{fastener_category} Class", list(FASTENER_CLASSES.keys()), index=None,
+                                       key=f"{prefix}_class")
+        fastener = FASTENER_CLASSES.get(class_name)
 
-        nut_types = []
+        fastener_types = []
         if class_name:
             try:
-                nut_types = list(NUT_CLASSES[class_name].types())
+                fastener_types = get_catalog().types(fastener.name)
             except Exception:
                 st.error(f"Could not load types for {class_name}")
 
-        nut_type = cols[1].selectbox("Nut Type", nut_types, index=None, key="nut_type", disabled=not class_name)
+        fastener_type = cols[1].selectbox(f"{fastener_category} Type", fastener_types, index=None,
+                                          key=f"{prefix}_type", disabled=not class_name)
 
-        nut_sizes = []
-        if class_name and nut_type:
+        fastener_sizes = []
+        if class_name and fastener_type:
             try:
-                nut_sizes = list(NUT_CLASSES[class_name].sizes(nut_type))
+                fastener_sizes = get_catalog().sizes(fastener.name, fastener_type)
             except Exception:
-                st.error(f"Could not load sizes for {nut_type}")
-
-        nut_size = cols[2].selectbox("Nut Size", nut_sizes, index=None, key="nut_size", disabled=not nut_type)
+                st.error(f"Could not load sizes for {fastener_type}")
+
+        fastener_size = cols[2].selectbox(f"{fastener_category} Size", fastener_sizes, index=None,
+                                          key=f"{prefix}_size", disabled=not fastener_type)
+
+        fastener_params = {"size": fastener_size, "fastener_type": fastener_type}
+        if fastener_category == "Screw":
+            fastener_params["length"] = st.number_input("Length (mm)", value=10.0, min_value=1.0, step=1.0,
+                                                        disabled=not fastener_size)
+        if fastener_category in ("Nut", "Screw"):
+            fastener_params["simple"] = not st.checkbox("Show Threads (slower)", value=False)
+
+        if fastener_size:
+            show_preview(fastener, fastener_params)
+        generate_buttons(f"Generate {fastener_category}", fastener, fastener_params, disabled=not fastener_size)
+
+
+#----------------------------------BATCH-------------------------------------------------------------------------------
+if option == "Batch (BOM)":
+    st.subheader("Bill of Materials")
+    st.caption("Upload a CSV/JSON BOM or edit the table. Each row needs a component (class name or label); "
+               "blank cells use the component defaults. Identical rows are built once. "
+               "Optional x, y, z, rz columns position the part in the assembly.")
+
+    if 'batch_file' not in st.session_state:
+        st.session_state.batch_file = None
+
+    bom_upload = st.file_uploader("BOM file", type=["csv", "json"])
+    bom_columns = list(batch.RESERVED)
+    for component in REGISTRY.values():
+        bom_columns += [p.name for p in component.params if p.name not in bom_columns]
+    example_rows = [
+        {"component": "Hex Nut", "quantity": 8, "size": "M3-0.5", "fastener_type": "iso4032"},
+        {"component": "Socket Head Cap Screw", "quantity": 8, "size": "M3-0.5", "fastener_type": "iso4762",
+         "length": 10},
+        {"component": "Spur Gear", "quantity": 1, "module": 1, "teeth_number": 20},
+    ]
+    bom_table = None
+    if bom_upload is None:
+        bom_table = st.data_editor([{c: row.get(c) for c in bom_columns} for row in example_rows],
+                                   num_rows="dynamic", use_container_width=True, key="bom_table")
+
+    as_assembly = st.checkbox("Also export a single STEP assembly", value=False,
+                              help="All parts in one file; identical parts share one geometry definition.")
 
-        show_threads = st.checkbox("Show Threads (slower)", value=False)
-
-        btn_cols = st.columns(2)
-        with btn_cols[0]:
-            if st.button(f"Generate Nut", disabled=not nut_size):
-                try:
-                    instance = NUT_CLASSES[class_name](size=nut_size, fastener_type=nut_type, simple=not show_threads)
-                    temp_dir = tempfile.gettempdir()
-                    file_name = f"{class_name}_{nut_size.replace('/', '_')}.step"
-                    temp_path = os.path.join(temp_dir, file_name)
-                    cq.exporters.export(instance, temp_path)
-
-                    with open(temp_path, "rb") as f:
-                        st.session_state.generated_file = {
-                            "data": f.read(), "name": file_name, "label": f"Download STEP file"
-                        }
-                    st.success("File ready!")
-                except Exception as e:
-                    st.error(f"An error occurred: {e}")
-                    clear_download_state()
-                finally:
-                    if 'temp_path' in locals() and os.path.exists(temp_path):
-                        os.remove(temp_path)
-        with btn_cols[1]:
-            if st.session_state.generated_file:
-                st.download_button(
-                    label=st.session_state.generated_file["label"],
-                    data=st.session_state.generated_file["data"],
-                    file_name=st.session_state.generated_file["name"],
-                    mime="application/octet-stream"
-                )
+    btn_cols = st.columns(2)
+    with btn_cols[0]:
+        run = st.button("Generate Batch")
+    if run:
+        st.session_state.batch_file = None
+        try:
+            if bom_upload is not None:
+                rows = batch.read_bom(bom_upload.getvalue(), bom_upload.name)
             else:
-                st.button("Download STEP File", disabled=True)
-
-
-    elif fastener_category == "Screw":
-        st.subheader("Screw Specifications")
-        SCREW_CLASSES = {"Socket Head Cap Screw": SocketHeadCapScrew, "Counter Sunk Screw": CounterSunkScrew,
-                         "Pan Head Screw": PanHeadScrew, "Hex Head Screw": HexHeadScrew, "Set Screw": SetScrew}
-
-        cols = st.columns(3)
-        class_name = cols[0].selectbox("Screw Class", list(SCREW_CLASSES.keys()), index=None, key="screw_class")
-
-        screw_types = []
-        if class_name:
-            try:
-                screw_types = list(SCREW_CLASSES[class_name].types())
-            except Exception:
-                st.error(f"Could not load types for {class_name}")
-
-        screw_type = cols[1].selectbox("Screw Type", screw_types, index=None, key="screw_type", disabled=not class_name)
-
-        screw_sizes = []
-        if class_name and screw_type:
-            try:
-                screw_sizes = list(SCREW_CLASSES[class_name].sizes(screw_type))
-            except Exception:
-                st.error(f"Could not load sizes for {screw_type}")
-
-        screw_size = cols[2].selectbox("Screw Size", screw_sizes, index=None, key="screw_size", disabled=not screw_type)
-
-        length = st.number_input("Length (mm)", value=10.0, min_value=1.0, step=1.0, disabled=not screw_size)
-        show_threads = st.checkbox("Show Threads (slower)", value=False)
-
-        btn_cols = st.columns(2)
-        with btn_cols[0]:
-            if st.button(f"Generate Screw", disabled=not screw_size):
+                rows = [batch.row_from_record(r) for r in bom_table if r.get("component")]
+        except (ValidationError, ValueError) as e:
+            st.error(f"Could not read BOM: {e}")
+            rows = []
+
+        if rows:
+            progress = st.progress(0.0, text="Generating parts...")
+            report = st.empty()
+            report_rows = []
+            results = []
+
+            def tracked(results_iter):
+                for result in results_iter:
+                    results.append(result)
+                    report_rows.append({"rows": " ".join(map(str, result.rows)), "component": result.component,
+                                        "file": result.name, "qty": result.quantity, "status": result.state,
+                                        "seconds": round(result.elapsed, 2), "error": result.error or ""})
+                    done = sum(len(r["rows"].split()) for r in report_rows)
+                    progress.progress(min(done / len(rows), 1.0), text=f"{done}/{len(rows)} rows finished")
+                    report.dataframe(report_rows, use_container_width=True)
+                    yield result
+
+            results_iter = batch.run_batch(rows, get_engine(), user=st.session_state.user_id)
+            archive = b"".join(batch.iter_zip(tracked(results_iter)))
+            failed = sum(1 for r in report_rows if r["status"] != "done")
+            st.session_state.batch_file = {"blob": default_blobs().put(archive), "name": "mechcad_bom.zip",
+                                           "failed": failed}
+
+            parts = batch.assembly_parts(results) if as_assembly else []
+            if parts:
+                engine = get_engine()
+                job_id = None
                 try:
-                    instance = SCREW_CLASSES[class_name](size=screw_size, fastener_type=screw_type, length=length,
-                                                         simple=not show_threads)
-                    temp_dir = tempfile.gettempdir()
-                    file_name = f"{class_name}_{screw_size.replace('/', '_')}_x{length}.step"
-                    temp_path = os.path.join(temp_dir, file_name)
-                    cq.exporters.export(instance, temp_path)
-
-                    with open(temp_path, "rb") as f:
-                        st.session_state.generated_file = {
-                            "data": f.read(), "name": file_name, "label": f"Download STEP File"
-                        }
-                    st.success("File ready!")
+                    job_id = engine.submit_assembly(parts, "mechcad_bom", user=st.session_state.user_id)
+                    with st.spinner("Building assembly..."):
+                        assembly = engine.result(job_id)
+                    st.session_state.batch_file["assembly"] = {"blob": default_blobs().put(assembly.data),
+                                                               "name": assembly.name}
                 except Exception as e:
-                    st.error(f"An error occurred: {e}")
-                    clear_download_state()
+                    st.error(f"Could not build the assembly: {e}")
                 finally:
-                    if 'temp_path' in locals() and os.path.exists(temp_path):
-                        os.remove(temp_path)
-        with btn_cols[1]:
-            if st.session_state.generated_file:
-                st.download_button(
-                    label=st.session_state.generated_file["label"],
-                    data=st.session_state.generated_file["data"],
-                    file_name=st.session_state.generated_file["name"],
-                    mime="application/octet-stream"
-                )
-            else:
-                st.button("Download STEP File", disabled=True)
-
-
-    elif fastener_category == "Washer":
-        st.subheader("Washer Specifications")
-        WASHER_CLASSES = {"Plain Washer": PlainWasher, "Chamfered Washer": ChamferedWasher}
-
-        cols = st.columns(3)
-        class_name = cols[0].selectbox("Washer Class", list(WASHER_CLASSES.keys()), index=None, key="washer_class")
-
-        washer_types = []
-        if class_name:
-            try:
-                washer_types = list(WASHER_CLASSES[class_name].types())
-            except Exception:
-                st.error(f"Could not load types for {class_name}")
-
-        washer_type = cols[1].selectbox("Washer Type", washer_types, index=None, key="washer_type",
-                                        disabled=not class_name)
+                    if job_id is not None:
+                        engine.forget(job_id)
 
-        washer_sizes = []
-        if class_name and washer_type:
-            try:
-                washer_sizes = list(WASHER_CLASSES[class_name].sizes(washer_type))
-            except Exception:
-                st.error(f"Could not load sizes for {washer_type}")
+    if st.session_state.batch_file:
+        if st.session_state.batch_file["failed"]:
+            st.warning(f"{st.session_state.batch_file['failed']} part(s) failed; see report.csv in the archive.")
+        else:
+            st.success("All parts ready!")
+    with btn_cols[1]:
+        if st.session_state.batch_file:
+            download_blob("Download ZIP", st.session_state.batch_file["blob"],
+                          st.session_state.batch_file["name"], "application/zip")
+            if st.session_state.batch_file.get("assembly"):
+                download_blob("Download Assembly STEP", st.session_state.batch_file["assembly"]["blob"],
+                              st.session_state.batch_file["assembly"]["name"])
+        else:
+            st.button("Download ZIP", disabled=True)
 
-        washer_size = cols[2].selectbox("Washer Size", washer_sizes, index=None, key="washer_size",
-                                        disabled=not washer_type)
 
-        btn_cols = st.columns(2)
-        with btn_cols[0]:
-            if st.button(f"Generate Washer", disabled=not washer_size):
-                try:
-
-                    instance = WASHER_CLASSES[class_name](size=washer_size, fastener_type=washer_type)
-                    temp_dir = tempfile.gettempdir()
-                    file_name = f"{class_name}_{washer_size.replace('/', '_')}.step"
-                    temp_path = os.path.join(temp_dir, file_name)
-                    cq.exporters.export(instance, temp_path)
-
-                    with open(temp_path, "rb") as f:
-                        st.session_state.generated_file = {
-                            "data": f.read(), "name": file_name, "label": f"Download STEP File"
-                        }
-                    st.success("File ready!")
-                except Exception as e:
-                    st.error(f"An error occurred: {e}")
-                    clear_download_state()
-                finally:
-                    if 'temp_path' in locals() and os.path.exists(temp_path):
-                        os.remove(temp_path)
-        with btn_cols[1]:
-            if st.session_state.generated_file:
-                st.download_button(
-                    label=st.session_state.generated_file["label"],
-                    data=st.session_state.generated_file["data"],
-                    file_name=st.session_state.generated_file["name"],
-                    mime="application/octet-stream"
-                )
-            else:
-                st.button("Download STEP File", disabled=True)
+with st.sidebar:
+    part_query = st.text_input("Find a bearing or fastener", placeholder="e.g. hex m3, 6204, iso4762 m5")
+    if part_query:
+        matches = get_catalog().search(part_query, limit=100)
+        if matches:
+            st.dataframe([{"part": m["label"], "type": m["type"], "size": m["size"],
+                           **{k: v for k, v in m["dims"].items()}} for m in matches],
+                         hide_index=True, use_container_width=True)
+        else:
+            st.caption("No matching parts.")
+
+cache_stats = default_cache().stats()
+st.sidebar.caption(f"STEP cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses, "
+                   f"{cache_stats['entries']} parts ({cache_stats['bytes'] / 1e6:.1f} MB)")
+blob_stats = default_blobs().stats()
+st.sidebar.caption(f"Download store: {blob_stats['entries']} files ({blob_stats['bytes'] / 1e6:.1f} MB)")
+
+# the CAD stack is only imported by the worker processes and the catalog pre-warm,
+# both started here so they never delay the first render
+prewarm_stats = prewarm()
+startup = get_engine().startup_stats()
+with st.sidebar.expander("Diagnostics"):
+    def seconds(value):
+        return "pending" if value is None else f"{value:.2f} s"
+    st.caption(f"Workers warm: {startup['workers_warm']}/{startup['workers']}")
+    st.caption(f"CAD import (worker): {seconds(startup['worker_import_seconds'])}")
+    st.caption(f"Catalog load: {seconds(prewarm_stats.get('catalog_seconds'))}")
+    st.caption(f"First generation: {seconds(startup['first_build_seconds'])}")
+    latency = get_engine().metrics.summary()
+    counters = latency["counters"]
+    st.caption(f"Requests: {counters.get('requests', 0)}, coalesced duplicates: {counters.get('coalesced', 0)}, "
+               f"failed: {counters.get('failed', 0)}, cancelled: {counters.get('cancelled', 0)}, "
+               f"killed: {counters.get('killed', 0)}")
+    admission = get_engine().admission.stats()
+    st.caption(f"Builds running: {admission['running']}, waiting: {admission['waiting']} "
+               f"(at most {admission['max_per_user']} per session, {admission['timeout']:.0f} s limit)")
+    stage_rows = [{"stage": s["stage"], "n": s["count"], "p50": round(s["p50"], 3), "p90": round(s["p90"], 3),
+                   "p99": round(s["p99"], 3)} for s in latency["stages"] if s["component"] == "*"]
+    if stage_rows:
+        st.caption("Latency by stage (s), last 1000 requests")
+        st.dataframe(stage_rows, hide_index=True, use_container_width=True)
+    for slow in latency["slow"][:5]:
+        st.caption(f"Slow: {slow['component']} {slow['timings'].get('total', 0):.1f} s {slow['params']}"
+                   + (f" (profile: {slow['profile']})" if slow["profile"] else ""))